@@ -8,11 +8,12 @@ Usage:
     python agent_pipeline.py --customer <id>   # Analyze by customer
     python agent_pipeline.py --city <name>     # Analyze by city
     python agent_pipeline.py --type <type>     # Analyze by customer type
+    python agent_pipeline.py --city <name> --triage   # Coarse labels only, several calls per request
 """
 
 import os
 import sys
-import json
+import orjson
 import argparse
 from datetime import datetime
 import pandas as pd
@@ -22,6 +23,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.agents import InsightsAgent, AggregationAgent
 from src.config import NVIDIA_MODEL, OUTPUT_DIR
+from src.utils.data_loader import read_excel_cached
 
 
 def print_banner():
@@ -44,7 +46,7 @@ def load_data(filepath: str = "Data Voice Hackathon_Master.xlsx") -> pd.DataFram
     for path in paths_to_try:
         if os.path.exists(path):
             print(f"📂 Loading data from {path}...")
-            df = pd.read_excel(path)
+            df = read_excel_cached(path)
             print(f"✅ Loaded {len(df):,} records")
             return df
     
@@ -145,11 +147,11 @@ def analyze_single_transcript_interactive(agent: InsightsAgent):
     return result
 
 
-def analyze_by_customer(df: pd.DataFrame, customer_id: int, agent: AggregationAgent):
+def analyze_by_customer(df: pd.DataFrame, customer_id: int, agent: AggregationAgent, triage: bool = False):
     """Analyze all transcripts for a specific customer"""
     print(f"\n👤 Analyzing customer: {customer_id}")
     
-    result = agent.aggregate_by_customer(df, customer_id)
+    result = agent.aggregate_by_customer(df, customer_id, triage=triage)
     
     if 'error' in result:
         print(f"❌ {result['error']}")
@@ -171,11 +173,11 @@ def analyze_by_customer(df: pd.DataFrame, customer_id: int, agent: AggregationAg
     return result
 
 
-def analyze_by_city(df: pd.DataFrame, city: str, agent: AggregationAgent):
+def analyze_by_city(df: pd.DataFrame, city: str, agent: AggregationAgent, triage: bool = False):
     """Analyze all transcripts for a specific city"""
     print(f"\n📍 Analyzing city: {city}")
     
-    result = agent.aggregate_by_location(df, city)
+    result = agent.aggregate_by_location(df, city, triage=triage)
     
     if 'error' in result:
         print(f"❌ {result['error']}")
@@ -194,11 +196,12 @@ def analyze_by_city(df: pd.DataFrame, city: str, agent: AggregationAgent):
     return result
 
 
-def analyze_by_customer_type(df: pd.DataFrame, customer_type: str, agent: AggregationAgent, sample_size: int = 30):
+def analyze_by_customer_type(df: pd.DataFrame, customer_type: str, agent: AggregationAgent, sample_size: int = 30,
+                             triage: bool = False):
     """Analyze transcripts for a specific customer type"""
     print(f"\n👥 Analyzing customer type: {customer_type}")
     
-    result = agent.aggregate_by_customer_type(df, customer_type, sample_size=sample_size)
+    result = agent.aggregate_by_customer_type(df, customer_type, sample_size=sample_size, triage=triage)
     
     if 'error' in result:
         print(f"❌ {result['error']}")
@@ -264,8 +267,8 @@ def save_results(result: dict, prefix: str):
     
     filename = f"{OUTPUT_DIR}/agent_analysis_{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(save_result, f, ensure_ascii=False, indent=2, default=str)
+    with open(filename, 'wb') as f:
+        f.write(orjson.dumps(save_result, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
     
     print(f"\n💾 Results saved to {filename}")
 
@@ -274,6 +277,8 @@ def interactive_mode(df: pd.DataFrame):
     """Run interactive mode"""
     insights_agent = InsightsAgent(verbose=True)
     aggregation_agent = AggregationAgent(verbose=True)
+    # Lower-cased transcripts for keyword search, built on the first search
+    transcripts_lower = None
     
     while True:
         print("\n" + "=" * 80)
@@ -343,7 +348,10 @@ Select an option:
         elif choice == "6":
             keyword = input("\nEnter keyword to search: ").strip()
             if keyword:
-                matches = df[df['transcript'].str.contains(keyword, case=False, na=False)]
+                if transcripts_lower is None:
+                    transcripts_lower = df['transcript'].str.lower()
+                # Plain substring scan: the keyword is text, not a regex
+                matches = df[transcripts_lower.str.contains(keyword.lower(), regex=False, na=False)]
                 print(f"\n🔍 Found {len(matches)} transcripts containing '{keyword}'")
                 
                 if len(matches) > 0:
@@ -395,6 +403,10 @@ def main():
     parser.add_argument("--city", type=str, help="Analyze by city name")
     parser.add_argument("--type", type=str, help="Analyze by customer type")
     parser.add_argument("--sample-size", type=int, default=30, help="Sample size for analysis")
+    parser.add_argument(
+        "--triage", action="store_true",
+        help="Only label category, undertone and churn risk, several calls per request (faster)"
+    )
     parser.add_argument("--input", default="Data Voice Hackathon_Master.xlsx", help="Input data file")
     
     args = parser.parse_args()
@@ -414,13 +426,13 @@ def main():
         analyze_single_transcript_interactive(insights_agent)
     
     elif args.customer:
-        analyze_by_customer(df, args.customer, aggregation_agent)
+        analyze_by_customer(df, args.customer, aggregation_agent, args.triage)
     
     elif args.city:
-        analyze_by_city(df, args.city, aggregation_agent)
+        analyze_by_city(df, args.city, aggregation_agent, args.triage)
     
     elif args.type:
-        analyze_by_customer_type(df, args.type, aggregation_agent, args.sample_size)
+        analyze_by_customer_type(df, args.type, aggregation_agent, args.sample_size, args.triage)
     
     else:
         # Interactive mode
@@ -18,6 +18,8 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from collections import Counter
 
+from src.utils.data_loader import read_excel_cached
+
 # =============================================================================
 # PAGE CONFIGURATION
 # =============================================================================
@@ -76,7 +78,7 @@ def load_raw_data():
     for path in paths:
         if os.path.exists(path):
             try:
-                return pd.read_excel(path)
+                return read_excel_cached(path)
             except:
                 pass
     return None
@@ -266,7 +268,7 @@ def main():
     with col2:
         st.metric("Unique Customers", f"{filtered_df['glid'].nunique():,}")
     with col3:
-        repeat_rate = len(filtered_df[filtered_df['is_ticket_repeat60d'] == 'Yes']) / len(filtered_df) * 100
+        repeat_rate = (filtered_df['is_ticket_repeat60d'] == 'Yes').sum() / len(filtered_df) * 100
         st.metric("Repeat Ticket Rate", f"{repeat_rate:.1f}%")
     with col4:
         st.metric("Avg Call Duration", f"{filtered_df['call_duration'].mean():.0f}s")
@@ -8,20 +8,25 @@ Usage:
     # Single file
     python audio_pipeline.py --audio audio/testaud.mp3
     
-    # Folder of audio files
+    # Folder of audio files (results go to output/batch_<folder>.jsonl unless
+    # --output is given; re-running skips files already processed there)
     python audio_pipeline.py --folder ./recordings
     
+    # Folder of audio files, starting over instead of resuming
+    python audio_pipeline.py --folder ./recordings --no-resume
+    
     # Interactive mode
     python audio_pipeline.py
 """
 
 import os
 import sys
-import json
 import argparse
 from pathlib import Path
 from datetime import datetime
 
+import orjson
+
 sys.path.insert(0, str(Path(__file__).parent))
 
 
@@ -57,8 +62,8 @@ def process_single_audio(args):
     output_file = args.output or f"output/analysis_{Path(args.audio).stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     Path(output_file).parent.mkdir(parents=True, exist_ok=True)
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
     
     print(f"\n💾 Results saved to: {output_file}")
     
@@ -84,11 +89,16 @@ def process_folder(args):
         verbose=True
     )
     
-    output_file = args.output or f"output/batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    # Named after the folder rather than the time, so a re-run finds and
+    # resumes the previous run's results
+    output_file = args.output or f"output/batch_{Path(args.folder).resolve().name}.jsonl"
+    if Path(output_file).suffix.lower() == '.json':
+        print(f"⚠️  {output_file}: folder results are written as JSON Lines (one object per line), not a JSON document")
     
     results = manager.process_folder(
         folder_path=args.folder,
-        output_file=output_file
+        output_file=output_file,
+        resume=not args.no_resume
     )
     
     return results
@@ -149,7 +159,17 @@ def main():
     
     parser.add_argument('--audio', type=str, help='Path to single audio file')
     parser.add_argument('--folder', type=str, help='Path to folder with audio files')
-    parser.add_argument('--output', type=str, help='Output file path')
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Output file path: indented JSON for --audio, JSON Lines (one result per file, '
+             'default output/batch_<folder>.jsonl) for --folder'
+    )
+    parser.add_argument(
+        '--no-resume',
+        action='store_true',
+        help='With --folder, reprocess every file instead of skipping those already in the output file'
+    )
     parser.add_argument('--city', type=str, help='City name')
     parser.add_argument('--customer-type', type=str, help='Customer type')
     parser.add_argument(
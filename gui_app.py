@@ -12,8 +12,9 @@ Run with: python gui_app.py
 
 import os
 import sys
-import json
+import orjson
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
@@ -22,8 +23,9 @@ import pandas as pd
 # Add src to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.agents import InsightsAgent, AggregationAgent
-from src.config import NVIDIA_MODEL, OUTPUT_DIR
+from src.agents import InsightsAgent, AggregationAgent, FrameIndex
+from src.config import NVIDIA_MODEL, OUTPUT_DIR, STT_WORKERS
+from src.utils.data_loader import read_excel_cached
 
 
 class InsightsEngineGUI:
@@ -35,6 +37,7 @@ class InsightsEngineGUI:
         
         # Data
         self.df = None
+        self.frame_index = None  # Lookups over self.df, rebuilt on every load
         self.insights_agent = None
         self.aggregation_agent = None
         self.current_result = None
@@ -671,10 +674,11 @@ Transcript 3 content here...""")
             paths = ["Data Voice Hackathon_Master.xlsx", "data/Data Voice Hackathon_Master.xlsx"]
             for path in paths:
                 if os.path.exists(path):
-                    self.df = pd.read_excel(path)
+                    self.df = read_excel_cached(path)
                     break
             
             if self.df is not None:
+                self.frame_index = FrameIndex(self.df)
                 self.data_label.config(text=f"📊 Loaded {len(self.df):,} records")
                 self.update_status(f"Data loaded: {len(self.df):,} records")
                 
@@ -736,7 +740,8 @@ Transcript 3 content here...""")
         self.single_result_text.delete('1.0', 'end')
         
         if result.get('analysis_success'):
-            text = f"""
+            # Collect the sections and join once instead of growing a string
+            parts = [f"""
 ╔══════════════════════════════════════════════════════════════════╗
 ║                    ANALYSIS RESULTS                               ║
 ╚══════════════════════════════════════════════════════════════════╝
@@ -749,37 +754,40 @@ Transcript 3 content here...""")
 
 ⚠️  CHURN RISK: {result.get('churn_risk_assessment', {}).get('risk_level', 'N/A')}
 
-"""
+"""]
+            append = parts.append
+            
             # Pain points
             pain_points = result.get('seller_pain_points', {})
             if pain_points:
-                text += "😟 SELLER PAIN POINTS:\n"
+                append("😟 SELLER PAIN POINTS:\n")
                 for k, v in pain_points.items():
                     if v and v != 'N/A' and v != 'None':
-                        text += f"   • {k}: {v}\n"
+                        append(f"   • {k}: {v}\n")
             
             # Opportunities
             opps = result.get('opportunities', {})
             if opps.get('upsell_opportunity'):
-                text += f"\n💰 UPSELL OPPORTUNITY: {opps.get('upsell_type', 'Yes')}\n"
+                append(f"\n💰 UPSELL OPPORTUNITY: {opps.get('upsell_type', 'Yes')}\n")
             
             # Education needed
             seller_understanding = result.get('seller_understanding', {})
             if seller_understanding.get('needs_base_education'):
-                text += f"\n📚 NEEDS EDUCATION: {', '.join(seller_understanding.get('education_topics_needed', []))}\n"
+                append(f"\n📚 NEEDS EDUCATION: {', '.join(seller_understanding.get('education_topics_needed', []))}\n")
             
             # Talking points
             talking_points = result.get('top_5_talking_points', [])
             if talking_points:
-                text += "\n💡 TOP TALKING POINTS:\n"
+                append("\n💡 TOP TALKING POINTS:\n")
                 for i, point in enumerate(talking_points[:5], 1):
-                    text += f"   {i}. {point}\n"
+                    append(f"   {i}. {point}\n")
             
             # Recommendation
-            text += f"\n🎯 RECOMMENDATION:\n   {result.get('proactive_recommendation', 'N/A')}\n"
+            append(f"\n🎯 RECOMMENDATION:\n   {result.get('proactive_recommendation', 'N/A')}\n")
             
             # Processing time
-            text += f"\n⏱️ Processing time: {result.get('processing_time', 'N/A')}s"
+            append(f"\n⏱️ Processing time: {result.get('processing_time', 'N/A')}s")
+            text = "".join(parts)
         else:
             text = f"❌ Analysis failed: {result.get('error', 'Unknown error')}"
         
@@ -852,41 +860,45 @@ Transcript 3 content here...""")
                     self.root.after(0, lambda: messagebox.showerror("Error", "Failed to load Vosk STT"))
                     return
                 
-                results = []
                 total = len(audio_files)
                 
-                for i, audio_path in enumerate(audio_files, 1):
+                def process(audio_path):
+                    """Transcribe and analyze one file (on a worker thread)"""
                     filename = os.path.basename(audio_path)
-                    self.root.after(0, lambda i=i, f=filename: self.batch_result_text.insert('end', f"[{i}/{total}] Transcribing: {f}\n"))
-                    self.root.after(0, lambda i=i: self.progress_var.set(i / total * 50))
+                    transcript = stt.transcribe(audio_path).get('transcript', '')
+                    if not transcript:
+                        return None
                     
-                    # Transcribe
-                    try:
-                        transcript_result = stt.transcribe(audio_path)
-                        transcript = transcript_result.get('transcript', '')
-                        
-                        if transcript:
-                            # Analyze with LLM
-                            self.root.after(0, lambda i=i: self.batch_result_text.insert('end', f"    Analyzing with LLM...\n"))
-                            
-                            insights = self.insights_agent.analyze_transcript(transcript, {'source': filename})
-                            
-                            results.append({
-                                'file': filename,
-                                'transcript': transcript[:500],
-                                'category': insights.get('primary_category', 'N/A'),
-                                'undertone': insights.get('seller_undertone', 'N/A'),
-                                'churn_risk': insights.get('churn_risk_assessment', {}).get('risk_level', 'N/A'),
-                                'summary': insights.get('issue_summary', 'N/A')
-                            })
-                            
-                            self.root.after(0, lambda cat=insights.get('primary_category'): 
-                                self.batch_result_text.insert('end', f"    ✅ Category: {cat}\n\n"))
-                    except Exception as e:
-                        self.root.after(0, lambda f=filename, e=str(e): 
-                            self.batch_result_text.insert('end', f"    ❌ Error: {e}\n\n"))
+                    insights = self.insights_agent.analyze_transcript(transcript, {'source': filename})
+                    return {
+                        'file': filename,
+                        'transcript': transcript[:500],
+                        'category': insights.get('primary_category', 'N/A'),
+                        'undertone': insights.get('seller_undertone', 'N/A'),
+                        'churn_risk': insights.get('churn_risk_assessment', {}).get('risk_level', 'N/A'),
+                        'summary': insights.get('issue_summary', 'N/A')
+                    }
+                
+                # Files are transcribed (sharing the one Vosk model) and analyzed
+                # concurrently; results keep the folder order
+                results = [None] * total
+                with ThreadPoolExecutor(max_workers=STT_WORKERS) as executor:
+                    futures = {executor.submit(process, audio_path): i for i, audio_path in enumerate(audio_files)}
                     
-                    self.root.after(0, lambda i=i: self.progress_var.set(50 + i / total * 50))
+                    for done, future in enumerate(as_completed(futures), 1):
+                        i = futures[future]
+                        message = f"[{done}/{total}] {os.path.basename(audio_files[i])}\n"
+                        try:
+                            results[i] = future.result()
+                            if results[i]:
+                                message += f"    ✅ Category: {results[i]['category']}\n\n"
+                        except Exception as e:
+                            message += f"    ❌ Error: {str(e)}\n\n"
+                        
+                        self.root.after(0, lambda m=message: self.batch_result_text.insert('end', m))
+                        self.root.after(0, lambda d=done: self.progress_var.set(d / total * 100))
+                
+                results = [r for r in results if r]
                 
                 # Display summary
                 def show_summary():
@@ -944,12 +956,12 @@ Transcript 3 content here...""")
                 
                 if analysis_type == "customer_type":
                     result = self.aggregation_agent.aggregate_by_customer_type(
-                        self.df, value, sample_size=sample_size
+                        self.df, value, sample_size=sample_size, index=self.frame_index
                     )
                 elif analysis_type == "city":
-                    result = self.aggregation_agent.aggregate_by_location(self.df, value)
+                    result = self.aggregation_agent.aggregate_by_location(self.df, value, index=self.frame_index)
                 elif analysis_type == "customer_id":
-                    result = self.aggregation_agent.aggregate_by_customer(self.df, int(value))
+                    result = self.aggregation_agent.aggregate_by_customer(self.df, int(value), index=self.frame_index)
                 else:
                     result = {'error': 'Invalid analysis type'}
                 
@@ -1083,8 +1095,10 @@ Transcript 3 content here...""")
             return
         
         agg = result.get('aggregated_insights', {})
+        total = max(result.get('total_analyzed', 1), 1)
         
-        text = f"""
+        # Collect the sections and join once instead of growing a string
+        parts = [f"""
 ╔══════════════════════════════════════════════════════════════════╗
 ║                   BATCH ANALYSIS RESULTS                          ║
 ╚══════════════════════════════════════════════════════════════════╝
@@ -1094,29 +1108,31 @@ Transcript 3 content here...""")
    Successful: {result.get('successful', 0)}
 
 🏷️  CATEGORY DISTRIBUTION
-"""
+"""]
+        append = parts.append
+        
         for cat, count in agg.get('category_distribution', {}).items():
-            pct = count / max(result.get('total_analyzed', 1), 1) * 100
+            pct = count / total * 100
             bar = "█" * int(pct / 5)
-            text += f"   {cat:25} {bar} {count} ({pct:.1f}%)\n"
+            append(f"   {cat:25} {bar} {count} ({pct:.1f}%)\n")
         
-        text += "\n😊 SENTIMENT DISTRIBUTION\n"
+        append("\n😊 SENTIMENT DISTRIBUTION\n")
         for sent, count in agg.get('sentiment_distribution', {}).items():
-            text += f"   • {sent}: {count}\n"
+            append(f"   • {sent}: {count}\n")
         
-        text += "\n⚠️  CHURN RISK DISTRIBUTION\n"
+        append("\n⚠️  CHURN RISK DISTRIBUTION\n")
         for risk, count in agg.get('churn_risk_distribution', {}).items():
-            text += f"   • {risk}: {count}\n"
+            append(f"   • {risk}: {count}\n")
         
-        text += "\n😟 TOP PAIN POINTS\n"
+        append("\n😟 TOP PAIN POINTS\n")
         for pp, count in list(agg.get('top_pain_points', {}).items())[:5]:
-            text += f"   • {pp}: {count}\n"
+            append(f"   • {pp}: {count}\n")
         
         if 'executive_summary' in result:
-            text += f"\n{'=' * 60}\n📋 EXECUTIVE SUMMARY\n{'=' * 60}\n\n"
-            text += result['executive_summary']
+            append(f"\n{'=' * 60}\n📋 EXECUTIVE SUMMARY\n{'=' * 60}\n\n")
+            append(result['executive_summary'])
         
-        self.batch_result_text.insert('end', text)
+        self.batch_result_text.insert('end', "".join(parts))
     
     def save_batch_result(self, result, analysis_type, value):
         """Save batch result to file"""
@@ -1126,8 +1142,8 @@ Transcript 3 content here...""")
         
         filename = f"{OUTPUT_DIR}/gui_analysis_{analysis_type}_{value}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(save_result, f, ensure_ascii=False, indent=2, default=str)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(save_result, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
         
         self.root.after(0, self.refresh_results_list)
     
@@ -1155,8 +1171,8 @@ Transcript 3 content here...""")
             
             self.result_viewer.delete('1.0', 'end')
             
-            data = json.loads(content)
-            pretty = json.dumps(data, indent=2, ensure_ascii=False)
+            data = orjson.loads(content)
+            pretty = orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
             self.result_viewer.insert('end', pretty)
             
         except Exception as e:
@@ -1185,8 +1201,8 @@ Transcript 3 content here...""")
                 save_result = {k: v for k, v in self.current_result.items() 
                               if k != 'individual_results'}
                 
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(save_result, f, ensure_ascii=False, indent=2, default=str)
+                with open(filepath, 'wb') as f:
+                    f.write(orjson.dumps(save_result, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
                 
                 messagebox.showinfo("Success", f"Results exported to {filepath}")
             except Exception as e:
@@ -21,6 +21,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.config import OUTPUT_DIR, CHECKPOINT_DIR
 from src.utils.helpers import print_header
+from src.utils.data_loader import read_excel_cached
 
 # Load environment variables
 load_dotenv()
@@ -46,7 +47,7 @@ def validate_api_key() -> str:
     if not api_key:
         print("❌ ERROR: NVIDIA API key not found!")
         print("\nTo set your API key:")
-        print("  1. Update src/config.py with your key")
+        print("  1. Add NVIDIA_API_KEY=your_key to a .env file in the project root")
         print("  2. Or set environment variable: $env:NVIDIA_API_KEY='your_key'")
         sys.exit(1)
     
@@ -68,7 +69,7 @@ def load_data(filepath: str = "Data Voice Hackathon_Master.xlsx") -> pd.DataFram
     
     for path in paths_to_try:
         if os.path.exists(path):
-            df = pd.read_excel(path)
+            df = read_excel_cached(path)
             print(f"✅ Loaded {len(df):,} records with {len(df.columns)} columns")
             return df
     
@@ -171,7 +172,7 @@ def run_full_classification(df: pd.DataFrame, api_key: str):
     print("💾 Checkpoints will be saved every batch")
     
     classifier = NvidiaClassifier(api_key=api_key)
-    processor = BatchProcessor(classifier, checkpoint_dir=CHECKPOINT_DIR)
+    processor = BatchProcessor(classifier, checkpoint_dir=CHECKPOINT_DIR, verbose=True)
     
     results_df = processor.process_with_checkpoints(df, batch_size=10, resume=True)
     
@@ -179,7 +180,7 @@ def run_full_classification(df: pd.DataFrame, api_key: str):
     results_df = flatten_classification_results(results_df)
     
     # Add 'ai_' prefix to classification columns
-    classification_cols = [c for c in results_df.columns if c not in ['original_index', 'call_id']]
+    classification_cols = [c for c in results_df.columns if c not in ['original_index', 'call_id', 'row_key']]
     rename_dict = {c: f'ai_{c}' for c in classification_cols}
     results_df = results_df.rename(columns=rename_dict)
     
@@ -214,7 +215,7 @@ def run_full_classification(df: pd.DataFrame, api_key: str):
 def run_quick_insights(df: pd.DataFrame):
     """Run quick insights extraction from existing summaries"""
     from src.aggregators import quick_insights_from_summary
-    import json
+    import orjson
     
     print("\n⚡ Running quick insights extraction from existing summaries...")
     
@@ -242,8 +243,8 @@ def run_quick_insights(df: pd.DataFrame):
     # Save insights
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     output_file = f"{OUTPUT_DIR}/quick_insights_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(insights, f, ensure_ascii=False, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(insights, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
     print(f"\n✅ Quick insights saved to {output_file}")
     
     return insights
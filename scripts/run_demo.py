@@ -19,6 +19,7 @@ from dotenv import load_dotenv
 
 from src.classifiers import NvidiaClassifier
 from src.utils.helpers import print_header, print_section
+from src.utils.data_loader import read_excel_cached
 
 load_dotenv()
 
@@ -113,7 +114,7 @@ def run_demo():
     
     if not api_key:
         print("❌ NVIDIA API key not found!")
-        print("   Please check src/config.py or set NVIDIA_API_KEY environment variable")
+        print("   Please set NVIDIA_API_KEY in .env or as an environment variable")
         return
     
     print("✅ NVIDIA NIM API configured")
@@ -121,7 +122,7 @@ def run_demo():
     
     # Load data
     print("\n📂 Loading dataset...")
-    df = pd.read_excel("Data Voice Hackathon_Master.xlsx")
+    df = read_excel_cached("Data Voice Hackathon_Master.xlsx")
     print(f"   Loaded {len(df):,} call records")
     
     # Select 5 diverse use cases
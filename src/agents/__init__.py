@@ -3,7 +3,7 @@ Agents module - LLM-powered agents for transcript analysis
 """
 
 from .insights_agent import InsightsAgent
-from .aggregation_agent import AggregationAgent
+from .aggregation_agent import AggregationAgent, FrameIndex
 
-__all__ = ['InsightsAgent', 'AggregationAgent']
+__all__ = ['InsightsAgent', 'AggregationAgent', 'FrameIndex']
 
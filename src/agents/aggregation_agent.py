@@ -3,23 +3,231 @@ AggregationAgent - LLM-powered agent for aggregating insights across multiple tr
 Supports aggregation by customer, vendor, location, or custom grouping
 """
 
-import json
-import time
-from typing import Dict, Any, List, Optional
+import os
+import queue
+import atexit
+import asyncio
+import threading
+from functools import cached_property
+from typing import Dict, Any, List, Optional, Tuple
 from collections import Counter
+import orjson
+import numpy as np
 import pandas as pd
 from openai import OpenAI
 
 from src.config import (
-    NVIDIA_BASE_URL,
     NVIDIA_MODEL,
     NVIDIA_API_KEY,
     MODEL_TEMPERATURE,
     MODEL_TOP_P,
     MODEL_MAX_TOKENS,
-    ISSUE_CATEGORIES
+    MIN_WORDS_FOR_LLM,
+    ISSUE_CATEGORIES,
+    SENTIMENT_LEVELS,
+    CHURN_RISK_LEVELS,
+    RESOLUTION_STATUSES
 )
 from src.agents.insights_agent import InsightsAgent
+from src.utils.llm_client import get_shared_client, get_shared_async_clients, run_sync
+
+# Fixed label vocabularies - counted as integer category codes. The prompts
+# answer INSUFFICIENT_DATA for calls they cannot label, and UNKNOWN stands in
+# for a missing label.
+CATEGORY_DTYPE = pd.CategoricalDtype([*ISSUE_CATEGORIES, 'INSUFFICIENT_DATA', 'UNKNOWN'])
+SENTIMENT_DTYPE = pd.CategoricalDtype([*SENTIMENT_LEVELS, 'INSUFFICIENT_DATA', 'UNKNOWN'])
+CHURN_RISK_DTYPE = pd.CategoricalDtype([*CHURN_RISK_LEVELS, 'INSUFFICIENT_DATA', 'UNKNOWN'])
+RESOLUTION_DTYPE = pd.CategoricalDtype([*RESOLUTION_STATUSES, 'INSUFFICIENT_DATA', 'UNKNOWN'])
+
+# Static instructions for the executive summary. Sent as the system message so
+# every summary request shares the same prompt prefix.
+EXECUTIVE_SUMMARY_SYSTEM_PROMPT = """You are an analyst preparing reports for IndiaMART customer service management.
+The user provides the aggregated results of a customer service call analysis as JSON.
+
+Create an executive summary including:
+1. **Overview**: Key findings at a glance
+2. **Critical Issues**: What needs immediate attention
+3. **Positive Trends**: What's working well
+4. **Risk Assessment**: Overall customer health
+5. **Top 5 Recommendations**: Prioritized action items
+6. **KPIs to Monitor**: Key metrics to track
+
+Format professionally for management review."""
+
+
+def _label_distribution(labels: List[str], dtype: pd.CategoricalDtype) -> Dict[str, int]:
+    """
+    Count labels, most common first. Labels in the vocabulary are counted as
+    category codes; anything else keeps its own value rather than being folded
+    into UNKNOWN.
+    """
+    labels = ['UNKNOWN' if label is None else label for label in labels]
+    codes = pd.Categorical(labels, dtype=dtype).codes
+    
+    counts = Counter(label for label, code in zip(labels, codes) if code < 0)
+    for label, count in zip(dtype.categories, np.bincount(codes[codes >= 0], minlength=len(dtype.categories))):
+        if count:
+            counts[label] = int(count)
+    return dict(counts.most_common())
+
+
+# Log lines emitted from inside an event loop are printed by a background
+# thread, so a slow stdout never stalls the other coroutines
+_log_queue = queue.SimpleQueue()
+_log_thread = None
+_log_thread_lock = threading.Lock()
+
+
+def _log_worker():
+    while True:
+        item = _log_queue.get()
+        if isinstance(item, threading.Event):
+            item.set()
+        else:
+            print(item)
+
+
+def _enqueue_log(message: str):
+    """Hand a message to the background printer, starting it on first use"""
+    global _log_thread
+    if _log_thread is None:
+        with _log_thread_lock:
+            if _log_thread is None:
+                _log_thread = threading.Thread(target=_log_worker, name="aggregation-log", daemon=True)
+                _log_thread.start()
+    _log_queue.put(message)
+
+
+def _flush_log(timeout: float = 5.0):
+    """Block until everything queued so far has been printed"""
+    if _log_thread is not None:
+        done = threading.Event()
+        _log_queue.put(done)
+        done.wait(timeout)
+
+
+def _reset_log_thread():
+    """The printer thread does not survive fork - start a fresh one in the child"""
+    global _log_queue, _log_thread, _log_thread_lock
+    _log_queue = queue.SimpleQueue()
+    _log_thread = None
+    _log_thread_lock = threading.Lock()
+
+
+atexit.register(_flush_log)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_log_thread)
+
+
+def _dumps(obj: Any) -> str:
+    """Indented JSON with sorted keys (stable prompt text), via orjson"""
+    return orjson.dumps(
+        obj,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    ).decode()
+
+
+def _word_counts(transcripts: pd.Series) -> np.ndarray:
+    """Words in each transcript"""
+    return transcripts.fillna('').astype(str).str.split().str.len().to_numpy()
+
+
+class FrameIndex:
+    """
+    Lookups over one DataFrame, built on first use and reused across queries
+    
+    Owned by the caller that owns the frame (the GUI queries the same frame
+    repeatedly). The index does not follow edits: build a new one whenever
+    the frame is reloaded or modified.
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._positions = {}
+        self._word_counts = None
+    
+    def positions_where(self, column: str, value: Any) -> np.ndarray:
+        """Row positions of df[df[column] == value], from a {value: positions} index of the column"""
+        positions = self._positions.get(column)
+        if positions is None:
+            positions = self._positions[column] = self.df.groupby(column, sort=False, observed=True).indices
+        return positions.get(value, np.empty(0, dtype=np.intp))
+    
+    def word_counts(self) -> np.ndarray:
+        """Words in each row's transcript"""
+        if self._word_counts is None:
+            self._word_counts = _word_counts(self.df['transcript'])
+        return self._word_counts
+
+
+def _positions_where(df: pd.DataFrame, column: str, value: Any, index: FrameIndex = None) -> np.ndarray:
+    """Row positions of df[df[column] == value], from index if it was built for df"""
+    if index is not None and index.df is df:
+        return index.positions_where(column, value)
+    return np.flatnonzero((df[column] == value).to_numpy())
+
+
+def _usable_transcripts(df: pd.DataFrame, positions: np.ndarray, index: FrameIndex = None) -> pd.DataFrame:
+    """Rows of df at positions whose transcript has at least MIN_WORDS_FOR_LLM words"""
+    if index is not None and index.df is df:
+        counts = index.word_counts()[positions]
+    else:
+        counts = _word_counts(df['transcript'].iloc[positions])
+    return df.iloc[positions[counts >= MIN_WORDS_FOR_LLM]]
+
+
+def _select_columns(df: pd.DataFrame, columns: List[str]):
+    """
+    Iterate the given columns as plain tuples (no per-row Series).
+    Missing columns yield '' like row.get(col, '') did.
+    """
+    return df.reindex(columns=columns, fill_value='').itertuples(index=False, name=None)
+
+
+def _stratified_sample(df: pd.DataFrame,
+                       n: int,
+                       strata_cols: tuple = ('is_ticket_repeat60d', 'FLAG_IN_OUT'),
+                       seed: int = 42) -> pd.DataFrame:
+    """
+    Sample n rows spread across strata instead of uniformly
+
+    Quotas are proportional to sqrt(group size), so rare strata (repeat
+    tickets, outgoing calls, ...) still get a share of the LLM budget.
+
+    Args:
+        df: DataFrame to sample from
+        n: Number of rows to return
+        strata_cols: Columns defining the strata (missing ones are ignored)
+        seed: Random seed for reproducible samples
+
+    Returns:
+        DataFrame with n sampled rows (or all rows if len(df) <= n)
+    """
+    if len(df) <= n:
+        return df
+    
+    cols = [c for c in strata_cols if c in df.columns]
+    if not cols:
+        return df.sample(n=n, random_state=seed)
+    
+    groups = list(df.groupby(cols, sort=True, dropna=False).indices.values())
+    sizes = np.array([len(g) for g in groups])
+    
+    # sqrt-proportional allocation, capped by group size
+    weights = np.sqrt(sizes)
+    quotas = np.minimum(np.floor(weights / weights.sum() * n).astype(int), sizes)
+    
+    # Hand out the remaining slots to the groups with spare rows, largest weight first
+    for i in np.argsort(-weights):
+        if quotas.sum() >= n:
+            break
+        quotas[i] += min(sizes[i] - quotas[i], n - quotas.sum())
+    
+    rng = np.random.default_rng(seed)
+    positions = np.concatenate([
+        rng.choice(idx, size=q, replace=False) for idx, q in zip(groups, quotas) if q > 0
+    ])
+    return df.iloc[np.sort(positions)]
 
 
 class AggregationAgent:
@@ -37,21 +245,49 @@ class AggregationAgent:
             verbose: Print detailed status messages
         """
         self.api_key = api_key or NVIDIA_API_KEY
-        self.client = OpenAI(
-            base_url=NVIDIA_BASE_URL,
-            api_key=self.api_key
-        )
         self.model = NVIDIA_MODEL
         self.verbose = verbose
-        self.insights_agent = InsightsAgent(api_key=self.api_key, verbose=False)
+        
+        # Async clients and concurrency limits, one per event loop
+        self.async_clients = get_shared_async_clients(self.api_key)
+    
+    @property
+    def client(self) -> OpenAI:
+        """
+        Process-wide client (one connection pool) shared with the InsightsAgent.
+        Looked up on every access, so a forked child gets its own pool.
+        """
+        return get_shared_client(self.api_key)
+    
+    @cached_property
+    def insights_agent(self) -> InsightsAgent:
+        """Per-transcript analyzer sharing this agent's clients, created on first use"""
+        return InsightsAgent(
+            api_key=self.api_key,
+            verbose=False,
+            async_clients=self.async_clients
+        )
+    
+    def _run(self, coro) -> Any:
+        """Blocking call of an async method, printing its queued log lines before returning"""
+        result = run_sync(coro)
+        _flush_log()
+        return result
         
     def _log(self, message: str):
-        """Print message if verbose mode is enabled"""
-        if self.verbose:
+        """Print message if verbose mode is enabled (queued when called from async code)"""
+        if not self.verbose:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
             print(message)
+        else:
+            _enqueue_log(message)
     
-    def _call_llm(self, prompt: str, system_prompt: str = None) -> str:
-        """Make a call to the LLM"""
+    async def _call_llm_async(self, prompt: str, system_prompt: str = None) -> str:
+        """Make a call to the LLM, bounded by LLM_CONCURRENCY in-flight requests"""
+        client, semaphore = self.async_clients.get()
         messages = []
         
         if system_prompt:
@@ -59,63 +295,98 @@ class AggregationAgent:
         
         messages.append({"role": "user", "content": prompt})
         
-        try:
-            response_text = ""
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=MODEL_TEMPERATURE,
-                top_p=MODEL_TOP_P,
-                max_tokens=MODEL_MAX_TOKENS,
-                stream=True
-            )
-            
-            for chunk in completion:
-                if chunk.choices[0].delta.content is not None:
-                    response_text += chunk.choices[0].delta.content
-            
-            return response_text.strip()
-            
-        except Exception as e:
-            self._log(f"❌ LLM Error: {str(e)}")
-            raise
+        async with semaphore:
+            try:
+                parts = []
+                append = parts.append
+                completion = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=MODEL_TEMPERATURE,
+                    top_p=MODEL_TOP_P,
+                    max_tokens=MODEL_MAX_TOKENS,
+                    stream=True
+                )
+                
+                async for chunk in completion:
+                    delta = chunk.choices[0].delta.content
+                    if delta is not None:
+                        append(delta)
+                
+                return "".join(parts).strip()
+                
+            except Exception as e:
+                self._log(f"❌ LLM Error: {str(e)}")
+                raise
     
     def analyze_multiple_transcripts(self, 
                                      transcripts: List[Dict[str, Any]], 
-                                     show_individual: bool = True) -> Dict[str, Any]:
+                                     show_individual: bool = True,
+                                     triage: bool = False) -> Dict[str, Any]:
         """
         Analyze multiple transcripts and return individual + aggregated insights
         
         Args:
             transcripts: List of dicts with 'transcript' and optional 'metadata' keys
             show_individual: Show status for each transcript
+            triage: Only label category, undertone and churn risk, several
+                calls per request (InsightsAgent.analyze_transcripts_batched)
             
         Returns:
             Dict with individual results and aggregated insights
         """
+        return self._run(self.analyze_multiple_transcripts_async(transcripts, show_individual, triage))
+    
+    async def analyze_multiple_transcripts_async(self,
+                                                 transcripts: List[Dict[str, Any]],
+                                                 show_individual: bool = True,
+                                                 triage: bool = False) -> Dict[str, Any]:
+        """
+        Async version of analyze_multiple_transcripts
+        
+        Transcripts are analyzed concurrently (bounded by LLM_CONCURRENCY
+        in-flight requests) instead of one after another.
+        """
         self._log(f"\n{'=' * 80}")
         self._log(f"🔍 ANALYZING {len(transcripts)} TRANSCRIPTS")
         self._log(f"{'=' * 80}")
         
-        results = []
+        results = [None] * len(transcripts)
+        pending = []
         
         for i, item in enumerate(transcripts):
             transcript = item.get('transcript', '')
             metadata = item.get('metadata', {})
             
-            if show_individual:
-                self._log(f"\n[{i+1}/{len(transcripts)}] Processing transcript...")
-                if metadata:
-                    self._log(f"   Customer: {metadata.get('customer_type', 'N/A')} | City: {metadata.get('city', 'N/A')}")
-            
-            result = self.insights_agent.analyze_transcript(transcript, metadata)
+            # Nothing for the LLM to work with - don't spend a request on it
+            if not isinstance(transcript, str) or len(transcript.split()) < MIN_WORDS_FOR_LLM:
+                results[i] = {
+                    'analysis_success': False,
+                    'skip_reason': 'too_short',
+                    'metadata': metadata
+                }
+            else:
+                pending.append(i)
+        
+        analyze = self.insights_agent.analyze_transcripts_batched if triage else self.insights_agent.analyze_many
+        analyzed = await analyze(
+            [transcripts[i].get('transcript', '') for i in pending],
+            [transcripts[i].get('metadata', {}) for i in pending]
+        )
+        
+        for i, result in zip(pending, analyzed):
+            metadata = transcripts[i].get('metadata', {})
             result['metadata'] = metadata
-            results.append(result)
-            
-            if show_individual and result.get('analysis_success'):
-                self._log(f"   ✅ {result.get('primary_category', 'N/A')} | {result.get('sentiment', 'N/A')}")
+            results[i] = result
             
-            time.sleep(0.3)  # Rate limiting
+            if show_individual:
+                # One message per transcript, so the lines stay together
+                status = f"\n[{i+1}/{len(transcripts)}] Processing transcript..."
+                if metadata:
+                    status += f"\n   Customer: {metadata.get('customer_type', 'N/A')} | City: {metadata.get('city', 'N/A')}"
+                if result.get('analysis_success'):
+                    status += f"\n   ✅ {result.get('primary_category', 'N/A')} | {result.get('sentiment', 'N/A')}"
+                self._log(status)
         
         # Generate aggregated insights
         aggregated = self._aggregate_results(results)
@@ -130,71 +401,68 @@ class AggregationAgent:
     def _aggregate_results(self, results: List[Dict]) -> Dict[str, Any]:
         """Aggregate results from multiple transcript analyses"""
         
-        # Count categories
-        categories = Counter(r.get('primary_category', 'UNKNOWN') for r in results if r.get('analysis_success'))
-        
-        # Count sentiments
-        sentiments = Counter(r.get('sentiment', 'UNKNOWN') for r in results if r.get('analysis_success'))
-        
-        # Count churn risks
-        churn_risks = Counter(r.get('churn_risk', 'UNKNOWN') for r in results if r.get('analysis_success'))
-        
-        # Count resolution status
-        resolutions = Counter(r.get('resolution_status', 'UNKNOWN') for r in results if r.get('analysis_success'))
+        # Single pass over the results collecting labels, counters and sums
+        category_labels, sentiment_labels, churn_labels, resolution_labels = [], [], [], []
+        pain_point_counts, keyword_counts = Counter(), Counter()
+        empathy = solution = process = escalation = follow_up = total = 0
         
-        # Collect all pain points
-        all_pain_points = []
         for r in results:
-            if r.get('analysis_success') and r.get('customer_pain_points'):
-                all_pain_points.extend(r['customer_pain_points'])
-        pain_point_counts = Counter(all_pain_points)
-        
-        # Collect all keywords
-        all_keywords = []
-        for r in results:
-            if r.get('analysis_success') and r.get('keywords'):
-                all_keywords.extend(r['keywords'])
-        keyword_counts = Counter(all_keywords)
-        
-        # Executive performance
-        exec_stats = {
-            'empathy_shown': sum(1 for r in results if r.get('executive_performance', {}).get('empathy_shown')),
-            'solution_offered': sum(1 for r in results if r.get('executive_performance', {}).get('solution_offered')),
-            'followed_process': sum(1 for r in results if r.get('executive_performance', {}).get('followed_process')),
-            'escalation_needed': sum(1 for r in results if r.get('executive_performance', {}).get('escalation_needed'))
-        }
-        
-        total = len([r for r in results if r.get('analysis_success')])
+            if not r.get('analysis_success'):
+                continue
+            total += 1
+            category_labels.append(r.get('primary_category'))
+            sentiment_labels.append(r.get('sentiment'))
+            churn_labels.append(r.get('churn_risk'))
+            resolution_labels.append(r.get('resolution_status'))
+            pain_point_counts.update(r.get('customer_pain_points') or ())
+            keyword_counts.update(r.get('keywords') or ())
+            
+            perf = r.get('executive_performance') or {}
+            empathy += bool(perf.get('empathy_shown'))
+            solution += bool(perf.get('solution_offered'))
+            process += bool(perf.get('followed_process'))
+            escalation += bool(perf.get('escalation_needed'))
+            follow_up += bool(r.get('requires_follow_up'))
+        
+        # Label distributions over the fixed vocabularies
+        categories = _label_distribution(category_labels, CATEGORY_DTYPE)
+        sentiments = _label_distribution(sentiment_labels, SENTIMENT_DTYPE)
+        churn_risks = _label_distribution(churn_labels, CHURN_RISK_DTYPE)
+        resolutions = _label_distribution(resolution_labels, RESOLUTION_DTYPE)
         
         return {
-            'category_distribution': dict(categories.most_common()),
-            'sentiment_distribution': dict(sentiments.most_common()),
-            'churn_risk_distribution': dict(churn_risks.most_common()),
-            'resolution_distribution': dict(resolutions.most_common()),
+            'category_distribution': categories,
+            'sentiment_distribution': sentiments,
+            'churn_risk_distribution': churn_risks,
+            'resolution_distribution': resolutions,
             'top_pain_points': dict(pain_point_counts.most_common(10)),
             'top_keywords': dict(keyword_counts.most_common(15)),
             'executive_performance': {
-                'empathy_rate': round(exec_stats['empathy_shown'] / total * 100, 1) if total > 0 else 0,
-                'solution_rate': round(exec_stats['solution_offered'] / total * 100, 1) if total > 0 else 0,
-                'process_compliance': round(exec_stats['followed_process'] / total * 100, 1) if total > 0 else 0,
-                'escalation_rate': round(exec_stats['escalation_needed'] / total * 100, 1) if total > 0 else 0
+                'empathy_rate': round(empathy / total * 100, 1) if total > 0 else 0,
+                'solution_rate': round(solution / total * 100, 1) if total > 0 else 0,
+                'process_compliance': round(process / total * 100, 1) if total > 0 else 0,
+                'escalation_rate': round(escalation / total * 100, 1) if total > 0 else 0
             },
             'high_churn_risk_count': churn_risks.get('HIGH', 0),
-            'follow_up_required_count': sum(1 for r in results if r.get('requires_follow_up'))
+            'follow_up_required_count': follow_up
         }
     
-    def aggregate_by_customer(self, df: pd.DataFrame, customer_id: Any) -> Dict[str, Any]:
+    def aggregate_by_customer(self, df: pd.DataFrame, customer_id: Any,
+                              index: Optional[FrameIndex] = None, triage: bool = False) -> Dict[str, Any]:
         """
         Aggregate all transcripts for a specific customer
         
         Args:
             df: DataFrame with transcript data
             customer_id: Customer ID (glid) to filter by
+            index: Optional FrameIndex of df, reused across queries
+            triage: Coarse labels only, several calls per request
             
         Returns:
             Aggregated insights for the customer
         """
-        customer_df = df[df['glid'] == customer_id]
+        positions = _positions_where(df, 'glid', customer_id, index)
+        customer_df = df.iloc[positions]
         
         if len(customer_df) == 0:
             return {'error': f'No records found for customer {customer_id}'}
@@ -205,88 +473,111 @@ class AggregationAgent:
         self._log(f"📊 Found {len(customer_df)} call records")
         
         # Prepare transcripts
-        transcripts = []
-        for _, row in customer_df.iterrows():
-            transcripts.append({
-                'transcript': row.get('transcript', ''),
+        rows = _select_columns(
+            _usable_transcripts(df, positions, index),
+            ['transcript', 'customer_type', 'city_name', 'FLAG_IN_OUT',
+             'is_ticket_repeat60d', 'call_duration', 'click_to_call_id']
+        )
+        transcripts = [
+            {
+                'transcript': transcript,
                 'metadata': {
-                    'customer_type': row.get('customer_type', ''),
-                    'city': row.get('city_name', ''),
-                    'call_direction': row.get('FLAG_IN_OUT', ''),
-                    'is_repeat': row.get('is_ticket_repeat60d', ''),
-                    'duration': row.get('call_duration', ''),
-                    'call_id': row.get('click_to_call_id', '')
+                    'customer_type': ctype,
+                    'city': city_name,
+                    'call_direction': direction,
+                    'is_repeat': repeat,
+                    'duration': duration,
+                    'call_id': call_id
                 }
-            })
+            }
+            for transcript, ctype, city_name, direction, repeat, duration, call_id in rows
+        ]
         
         # Analyze all transcripts
-        results = self.analyze_multiple_transcripts(transcripts, show_individual=True)
+        results = self.analyze_multiple_transcripts(transcripts, show_individual=True, triage=triage)
         
         # Add customer-specific summary
         results['customer_id'] = customer_id
         results['customer_type'] = customer_df['customer_type'].iloc[0]
         results['city'] = customer_df['city_name'].iloc[0]
         results['total_calls'] = len(customer_df)
-        results['repeat_calls'] = len(customer_df[customer_df['is_ticket_repeat60d'] == 'Yes'])
+        results['repeat_calls'] = int((customer_df['is_ticket_repeat60d'] == 'Yes').sum())
         
         # Generate customer-specific recommendations
         results['customer_recommendations'] = self._generate_customer_recommendations(results)
         
         return results
     
-    def aggregate_by_location(self, df: pd.DataFrame, city: str) -> Dict[str, Any]:
+    def aggregate_by_location(self, df: pd.DataFrame, city: str,
+                              index: Optional[FrameIndex] = None, triage: bool = False) -> Dict[str, Any]:
         """
         Aggregate all transcripts for a specific city/location
         
         Args:
             df: DataFrame with transcript data
             city: City name to filter by
+            index: Optional FrameIndex of df, reused across queries
+            triage: Coarse labels only, several calls per request
             
         Returns:
             Aggregated insights for the location
         """
-        city_df = df[df['city_name'] == city]
+        positions = _positions_where(df, 'city_name', city, index)
+        city_df = df.iloc[positions]
         
         if len(city_df) == 0:
             return {'error': f'No records found for city {city}'}
         
+        # Segment totals, taken before filtering and sampling
+        total_calls = len(city_df)
+        unique_customers = city_df['glid'].nunique()
+        
         self._log(f"\n{'=' * 80}")
         self._log(f"📍 LOCATION ANALYSIS: {city}")
         self._log(f"{'=' * 80}")
         self._log(f"📊 Found {len(city_df)} call records")
         
+        city_df = _usable_transcripts(df, positions, index)
+        
         # Sample if too many (for efficiency)
         if len(city_df) > 50:
             self._log(f"   ⚠️ Sampling 50 records from {len(city_df)} for analysis")
-            city_df = city_df.sample(n=50, random_state=42)
+            city_df = _stratified_sample(city_df, 50)
         
         # Prepare transcripts
-        transcripts = []
-        for _, row in city_df.iterrows():
-            transcripts.append({
-                'transcript': row.get('transcript', ''),
+        rows = _select_columns(
+            city_df,
+            ['transcript', 'customer_type', 'glid', 'FLAG_IN_OUT',
+             'is_ticket_repeat60d', 'call_duration']
+        )
+        transcripts = [
+            {
+                'transcript': transcript,
                 'metadata': {
-                    'customer_type': row.get('customer_type', ''),
+                    'customer_type': ctype,
                     'city': city,
-                    'customer_id': row.get('glid', ''),
-                    'call_direction': row.get('FLAG_IN_OUT', ''),
-                    'is_repeat': row.get('is_ticket_repeat60d', ''),
-                    'duration': row.get('call_duration', '')
+                    'customer_id': glid,
+                    'call_direction': direction,
+                    'is_repeat': repeat,
+                    'duration': duration
                 }
-            })
+            }
+            for transcript, ctype, glid, direction, repeat, duration in rows
+        ]
         
-        results = self.analyze_multiple_transcripts(transcripts, show_individual=True)
+        results = self.analyze_multiple_transcripts(transcripts, show_individual=True, triage=triage)
         
         results['city'] = city
-        results['total_calls_in_city'] = len(df[df['city_name'] == city])
-        results['unique_customers'] = df[df['city_name'] == city]['glid'].nunique()
+        results['total_calls_in_city'] = total_calls
+        results['unique_customers'] = unique_customers
         
         # Generate location-specific insights
         results['location_insights'] = self._generate_location_insights(results, city)
         
         return results
     
-    def aggregate_by_customer_type(self, df: pd.DataFrame, customer_type: str, sample_size: int = 50) -> Dict[str, Any]:
+    def aggregate_by_customer_type(self, df: pd.DataFrame, customer_type: str, sample_size: int = 50,
+                                   index: Optional[FrameIndex] = None, triage: bool = False) -> Dict[str, Any]:
         """
         Aggregate transcripts for a specific customer type
         
@@ -294,55 +585,69 @@ class AggregationAgent:
             df: DataFrame with transcript data
             customer_type: Customer type to filter by (CATALOG, TSCATALOG, STAR, etc.)
             sample_size: Number of samples to analyze
+            index: Optional FrameIndex of df, reused across queries
+            triage: Coarse labels only, several calls per request
             
         Returns:
             Aggregated insights for the customer type
         """
-        type_df = df[df['customer_type'] == customer_type]
+        positions = _positions_where(df, 'customer_type', customer_type, index)
+        type_df = df.iloc[positions]
         
         if len(type_df) == 0:
             return {'error': f'No records found for customer type {customer_type}'}
         
+        # Segment totals, taken before filtering and sampling
+        total_calls = len(type_df)
+        unique_customers = type_df['glid'].nunique()
+        
         self._log(f"\n{'=' * 80}")
         self._log(f"👥 CUSTOMER TYPE ANALYSIS: {customer_type}")
         self._log(f"{'=' * 80}")
         self._log(f"📊 Found {len(type_df)} call records")
         
+        type_df = _usable_transcripts(df, positions, index)
+        
         # Sample for efficiency
         if len(type_df) > sample_size:
             self._log(f"   📊 Sampling {sample_size} records for analysis")
-            type_df = type_df.sample(n=sample_size, random_state=42)
+            type_df = _stratified_sample(type_df, sample_size)
         
-        transcripts = []
-        for _, row in type_df.iterrows():
-            transcripts.append({
-                'transcript': row.get('transcript', ''),
+        rows = _select_columns(
+            type_df,
+            ['transcript', 'city_name', 'glid', 'is_ticket_repeat60d', 'call_duration']
+        )
+        transcripts = [
+            {
+                'transcript': transcript,
                 'metadata': {
                     'customer_type': customer_type,
-                    'city': row.get('city_name', ''),
-                    'customer_id': row.get('glid', ''),
-                    'is_repeat': row.get('is_ticket_repeat60d', ''),
-                    'duration': row.get('call_duration', '')
+                    'city': city_name,
+                    'customer_id': glid,
+                    'is_repeat': repeat,
+                    'duration': duration
                 }
-            })
+            }
+            for transcript, city_name, glid, repeat, duration in rows
+        ]
         
-        results = self.analyze_multiple_transcripts(transcripts, show_individual=True)
+        results = self.analyze_multiple_transcripts(transcripts, show_individual=True, triage=triage)
         
         results['customer_type'] = customer_type
-        results['total_calls_for_type'] = len(df[df['customer_type'] == customer_type])
-        results['unique_customers'] = df[df['customer_type'] == customer_type]['glid'].nunique()
+        results['total_calls_for_type'] = total_calls
+        results['unique_customers'] = unique_customers
         
         # Generate segment-specific recommendations
         results['segment_recommendations'] = self._generate_segment_recommendations(results, customer_type)
         
         return results
     
-    def _generate_customer_recommendations(self, results: Dict) -> str:
-        """Generate personalized recommendations for a customer"""
+    def _customer_recommendations_prompt(self, results: Dict) -> str:
+        """Build the customer recommendations prompt"""
         
         agg = results.get('aggregated_insights', {})
         
-        prompt = f"""Based on this customer's call history analysis, provide personalized recommendations.
+        return f"""Based on this customer's call history analysis, provide personalized recommendations.
 
 CUSTOMER ANALYSIS:
 - Total Calls: {results.get('total_calls', 0)}
@@ -359,18 +664,24 @@ Provide:
 4. **Retention Risk**: Is this customer at risk of churning and why
 
 Keep it concise and actionable."""
-
+    
+    def _generate_customer_recommendations(self, results: Dict) -> str:
+        """Generate personalized recommendations for a customer"""
+        return self._run(self._generate_customer_recommendations_async(results))
+    
+    async def _generate_customer_recommendations_async(self, results: Dict) -> str:
+        """Async version of _generate_customer_recommendations"""
         try:
-            return self._call_llm(prompt)
-        except:
+            return await self._call_llm_async(self._customer_recommendations_prompt(results))
+        except Exception:
             return "Unable to generate recommendations"
     
-    def _generate_location_insights(self, results: Dict, city: str) -> str:
-        """Generate location-specific insights"""
+    def _location_insights_prompt(self, results: Dict, city: str) -> str:
+        """Build the location insights prompt"""
         
         agg = results.get('aggregated_insights', {})
         
-        prompt = f"""Based on call analysis for {city}, provide location-specific insights.
+        return f"""Based on call analysis for {city}, provide location-specific insights.
 
 LOCATION ANALYSIS:
 - City: {city}
@@ -387,18 +698,24 @@ Provide:
 4. **Resource Allocation**: Any suggestions for support staffing?
 
 Keep it concise and actionable."""
-
+    
+    def _generate_location_insights(self, results: Dict, city: str) -> str:
+        """Generate location-specific insights"""
+        return self._run(self._generate_location_insights_async(results, city))
+    
+    async def _generate_location_insights_async(self, results: Dict, city: str) -> str:
+        """Async version of _generate_location_insights"""
         try:
-            return self._call_llm(prompt)
-        except:
+            return await self._call_llm_async(self._location_insights_prompt(results, city))
+        except Exception:
             return "Unable to generate location insights"
     
-    def _generate_segment_recommendations(self, results: Dict, customer_type: str) -> str:
-        """Generate segment-specific recommendations"""
+    def _segment_recommendations_prompt(self, results: Dict, customer_type: str) -> str:
+        """Build the segment recommendations prompt"""
         
         agg = results.get('aggregated_insights', {})
         
-        prompt = f"""Based on call analysis for {customer_type} customers, provide segment recommendations.
+        return f"""Based on call analysis for {customer_type} customers, provide segment recommendations.
 
 SEGMENT ANALYSIS:
 - Customer Type: {customer_type}
@@ -417,12 +734,41 @@ Provide:
 5. **Priority Actions**: Top 3 actions to improve this segment's experience
 
 Keep it concise and actionable."""
-
+    
+    def _generate_segment_recommendations(self, results: Dict, customer_type: str) -> str:
+        """Generate segment-specific recommendations"""
+        return self._run(self._generate_segment_recommendations_async(results, customer_type))
+    
+    async def _generate_segment_recommendations_async(self, results: Dict, customer_type: str) -> str:
+        """Async version of _generate_segment_recommendations"""
         try:
-            return self._call_llm(prompt)
-        except:
+            return await self._call_llm_async(self._segment_recommendations_prompt(results, customer_type))
+        except Exception:
             return "Unable to generate segment recommendations"
     
+    def _executive_summary_prompt(self, results: Dict) -> str:
+        """
+        Build the user message for the executive summary
+        
+        Only this message varies between calls; the instructions live in
+        EXECUTIVE_SUMMARY_SYSTEM_PROMPT so the prompt prefix stays identical
+        and can be served from the endpoint's prompt cache. Keys are sorted
+        so equal data always produces identical text.
+        """
+        agg = results.get('aggregated_insights', {})
+        
+        data = {
+            'total_calls_analyzed': results.get('total_analyzed', 0),
+            'successful_analysis': results.get('successful', 0),
+            'category_distribution': agg.get('category_distribution', {}),
+            'sentiment_distribution': agg.get('sentiment_distribution', {}),
+            'churn_risk': agg.get('churn_risk_distribution', {}),
+            'top_pain_points': agg.get('top_pain_points', {}),
+            'executive_performance': agg.get('executive_performance', {})
+        }
+        
+        return "ANALYSIS RESULTS (JSON):\n" + _dumps(data)
+    
     def generate_executive_summary(self, results: Dict) -> str:
         """
         Generate an executive summary from aggregated results
@@ -433,46 +779,54 @@ Keep it concise and actionable."""
         Returns:
             Executive summary text
         """
+        return self._run(self.generate_executive_summary_async(results))
+    
+    async def generate_executive_summary_async(self, results: Dict) -> str:
+        """Async version of generate_executive_summary"""
         self._log("\n📋 Generating executive summary...")
         
-        agg = results.get('aggregated_insights', {})
-        
-        prompt = f"""Create an executive summary of this customer service call analysis.
-
-ANALYSIS RESULTS:
-- Total Calls Analyzed: {results.get('total_analyzed', 0)}
-- Successful Analysis: {results.get('successful', 0)}
-
-CATEGORY DISTRIBUTION:
-{json.dumps(agg.get('category_distribution', {}), indent=2)}
-
-SENTIMENT DISTRIBUTION:
-{json.dumps(agg.get('sentiment_distribution', {}), indent=2)}
-
-CHURN RISK:
-{json.dumps(agg.get('churn_risk_distribution', {}), indent=2)}
-
-TOP PAIN POINTS:
-{json.dumps(agg.get('top_pain_points', {}), indent=2)}
-
-EXECUTIVE PERFORMANCE:
-{json.dumps(agg.get('executive_performance', {}), indent=2)}
-
-Create an executive summary including:
-1. **Overview**: Key findings at a glance
-2. **Critical Issues**: What needs immediate attention
-3. **Positive Trends**: What's working well
-4. **Risk Assessment**: Overall customer health
-5. **Top 5 Recommendations**: Prioritized action items
-6. **KPIs to Monitor**: Key metrics to track
-
-Format professionally for management review."""
-
         try:
-            summary = self._call_llm(prompt)
+            summary = await self._call_llm_async(
+                self._executive_summary_prompt(results),
+                system_prompt=EXECUTIVE_SUMMARY_SYSTEM_PROMPT
+            )
             self._log("   ✅ Summary generated")
             return summary
         except Exception as e:
             self._log(f"   ❌ Error: {str(e)}")
             return f"Error generating summary: {str(e)}"
+    
+    async def generate_reports_async(self, segments: List[Tuple[str, Dict]]) -> List[str]:
+        """
+        Generate several LLM reports concurrently
+        
+        Args:
+            segments: List of (report_type, results) pairs, where report_type is one of
+                'customer', 'location', 'customer_type' or 'executive_summary' and
+                results comes from the matching aggregate_* / analyze_* method
+            
+        Returns:
+            Report texts in the same order as segments
+        """
+        tasks = []
+        for report_type, results in segments:
+            if report_type == 'customer':
+                tasks.append(self._generate_customer_recommendations_async(results))
+            elif report_type == 'location':
+                tasks.append(self._generate_location_insights_async(results, results.get('city')))
+            elif report_type == 'customer_type':
+                tasks.append(self._generate_segment_recommendations_async(results, results.get('customer_type')))
+            elif report_type == 'executive_summary':
+                tasks.append(self.generate_executive_summary_async(results))
+            else:
+                raise ValueError(f"Unknown report type: {report_type}")
+        
+        self._log(f"\n📋 Generating {len(tasks)} reports concurrently...")
+        reports = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        return [f"Error generating report: {r}" if isinstance(r, Exception) else r for r in reports]
+    
+    def generate_reports(self, segments: List[Tuple[str, Dict]]) -> List[str]:
+        """Blocking wrapper around generate_reports_async"""
+        return self._run(self.generate_reports_async(segments))
 
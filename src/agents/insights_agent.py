@@ -5,76 +5,78 @@ AI-Assisted Sales & Servicing Enhancement (NOT replacement)
 Uses NVIDIA NIM Nemotron-4-Mini-Hindi for Hinglish text analysis
 """
 
+import re
 import json
 import time
-from typing import Dict, Any, List, Optional
-from openai import OpenAI
+import asyncio
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+import orjson
+from openai import OpenAI, BadRequestError
+from tenacity import AsyncRetrying, stop_after_attempt, retry_if_exception_type
 
 from src.config import (
-    NVIDIA_BASE_URL,
     NVIDIA_MODEL,
     NVIDIA_API_KEY,
     MODEL_TEMPERATURE,
     MODEL_TOP_P,
     MODEL_MAX_TOKENS,
+    MAX_RETRIES,
     ISSUE_CATEGORIES,
-    SELLER_UNDERTONES
+    SELLER_UNDERTONES,
+    CHURN_RISK_LEVELS,
+    INSIGHTS_CACHE_DIR
+)
+from src.utils.llm_client import (
+    AsyncClientCache,
+    ResponseCache,
+    get_shared_client,
+    get_shared_async_clients,
+    TRANSIENT_ERRORS,
+    retry_wait,
+    is_response_format_rejection,
+    extract_json_object,
+    schema_enum,
+    schema_object,
+    SCHEMA_STR,
+    SCHEMA_BOOL,
+    SCHEMA_STR_LIST
 )
 
 # =============================================================================
 # INDIAMART INSIGHTS EXTRACTION PROMPT
 # =============================================================================
 
-INSIGHTS_PROMPT = """You are an expert analyst for IndiaMART's customer service team.
-Your role is to ASSIST sales and servicing teams (NOT replace them) by extracting actionable insights.
-
-CRITICAL RULES:
-1. ONLY analyze content that is ACTUALLY PRESENT in the transcript
-2. DO NOT make up, imagine, or hallucinate any conversation content
-3. If the transcript is too short or unclear, say "INSUFFICIENT_DATA" for fields you cannot determine
-4. Be honest - if you cannot extract information, say so
-
-TRANSCRIPT:
-{transcript}
-
-CALL METADATA:
-- Seller Type: {customer_type}
-- City: {city}
-- Call Direction: {call_direction}
-- Is Repeat Ticket: {is_repeat}
-- Call Duration: {duration} seconds
-
-Analyze this call and provide comprehensive insights in JSON format:
-
-{{
+# Output layout requested by INSIGHTS_SYSTEM_PROMPT (sent minified to save prompt tokens)
+INSIGHTS_JSON_FORMAT = """{
     "primary_category": "<LEAD_QUALITY|PAYMENT_BILLING|CATALOG_MANAGEMENT|SUBSCRIPTION_RENEWAL|TECHNICAL_ISSUES|BUYLEAD_CONSUMPTION|SELLER_EDUCATION|ONBOARDING_ISSUES|CHURN_RISK|RETENTION_OPPORTUNITY|SERVICE_ESCALATION|PRODUCTION_SUPPORT|UPSELL_OPPORTUNITY|POSITIVE_FEEDBACK|FOLLOW_UP_REQUIRED|MISCELLANEOUS>",
     
-    "seller_pain_points": {{
+    "seller_pain_points": {
         "listing_issues": "<any listing/catalog problems mentioned>",
         "payment_delays": "<payment related issues>",
         "bl_quality_problems": "<BuyLead quality concerns>",
         "verification_hurdles": "<OVP/verification issues>",
         "other_pain_points": ["<list of other specific pain points>"]
-    }},
+    },
     
     "seller_undertone": "<ANGRY|IRRITATED|DISSATISFIED|DISENGAGED|CONFUSED|HESITANT|NEUTRAL|INTERESTED|SATISFIED|ENTHUSIASTIC>",
     
-    "sentiment_details": {{
+    "sentiment_details": {
         "urgency_level": "<HIGH|MEDIUM|LOW>",
         "frustration_indicators": ["<repeated phrases or frustration signals>"],
         "engagement_quality": "<HIGH|MEDIUM|LOW>",
         "conversation_complexity": "<SIMPLE|MODERATE|COMPLEX>"
-    }},
+    },
     
-    "churn_risk_assessment": {{
-        "risk_level": "<HIGH|MEDIUM|LOW|NONE>",
+    "churn_risk_assessment": {
+        "risk_level": "<""" + "|".join(CHURN_RISK_LEVELS) + """>",
         "churn_signals": ["<specific signals indicating churn risk>"],
         "competitor_mentions": "<any competitor mentioned>",
         "discontinuation_intent": <true/false>,
         "winback_opportunity": <true/false>
-    }},
+    },
     
-    "seller_understanding": {{
+    "seller_understanding": {
         "understands_products": "<YES|PARTIAL|NO>",
         "understands_seller_panel": "<YES|PARTIAL|NO>",
         "understands_lms": "<YES|PARTIAL|NO>",
@@ -82,9 +84,9 @@ Analyze this call and provide comprehensive insights in JSON format:
         "understands_diy_catalog": "<YES|PARTIAL|NO>",
         "needs_base_education": <true/false>,
         "education_topics_needed": ["<specific topics seller needs training on>"]
-    }},
+    },
     
-    "catalog_insights": {{
+    "catalog_insights": {
         "cqs_issues": "<any CQS related mentions>",
         "rank_issues": "<A Rank/D Rank issues>",
         "mcat_issues": "<MCAT category issues>",
@@ -92,26 +94,26 @@ Analyze this call and provide comprehensive insights in JSON format:
         "isq_improvement_needed": <true/false>,
         "needs_production_support": <true/false>,
         "production_priority": "<HIGH|MEDIUM|LOW|NONE>"
-    }},
+    },
     
-    "opportunities": {{
+    "opportunities": {
         "upsell_opportunity": <true/false>,
         "upsell_type": "<what can be upsold>",
         "renewal_opportunity": <true/false>,
         "engaged_but_not_renewing": <true/false>,
         "cross_sell_potential": ["<other products/services>"]
-    }},
+    },
     
-    "executive_performance": {{
+    "executive_performance": {
         "objection_handling": "<EXCELLENT|GOOD|NEEDS_IMPROVEMENT|POOR>",
         "product_knowledge_displayed": <true/false>,
         "empathy_shown": <true/false>,
         "solution_provided": <true/false>,
         "app_sharing_compliance_checked": <true/false>,
         "followed_process": <true/false>
-    }},
+    },
     
-    "action_items": {{
+    "action_items": {
         "immediate_actions": ["<actions needed right now>"],
         "follow_up_needed": <true/false>,
         "follow_up_reason": "<why follow-up is needed>",
@@ -119,7 +121,7 @@ Analyze this call and provide comprehensive insights in JSON format:
         "ticket_required": <true/false>,
         "escalation_needed": <true/false>,
         "production_work_order": <true/false>
-    }},
+    },
     
     "best_reach_method": "<Email|WhatsApp|Seller Panel|IM App|DIR|Help Page|Phone Call>",
     
@@ -140,72 +142,503 @@ Analyze this call and provide comprehensive insights in JSON format:
     "issue_summary": "<1-2 sentence summary of the main issue>",
     
     "proactive_recommendation": "<specific actionable recommendation for the team>"
-}}
+}"""
+
+_INSIGHTS_JSON_FORMAT_MINIFIED = re.sub(r"\s+", " ", INSIGHTS_JSON_FORMAT)
+
+INSIGHTS_SYSTEM_PROMPT = f"""You are an expert analyst for IndiaMART's customer service team.
+Your role is to ASSIST sales and servicing teams (NOT replace them) by extracting actionable insights.
+
+CRITICAL RULES:
+1. ONLY analyze content that is ACTUALLY PRESENT in the transcript
+2. DO NOT make up, imagine, or hallucinate any conversation content
+3. If the transcript is too short or unclear, say "INSUFFICIENT_DATA" for fields you cannot determine
+4. Be honest - if you cannot extract information, say so
+
+The user message contains a call TRANSCRIPT and its CALL METADATA.
+Analyze the call and provide comprehensive insights in this JSON format:
+{_INSIGHTS_JSON_FORMAT_MINIFIED}
 
 Respond ONLY with valid JSON."""
 
+# Per-call user message: transcript followed by the call metadata block,
+# which is formatted once per distinct metadata tuple
+INSIGHTS_METADATA_TEMPLATE = """
+
+CALL METADATA:
+- Seller Type: {customer_type}
+- City: {city}
+- Call Direction: {call_direction}
+- Is Repeat Ticket: {is_repeat}
+- Call Duration: {duration} seconds"""
+
+
+@lru_cache(maxsize=1024)
+def _metadata_block(customer_type: str, city: str, call_direction: str, is_repeat: str, duration: str) -> str:
+    return INSIGHTS_METADATA_TEMPLATE.format(
+        customer_type=customer_type,
+        city=city,
+        call_direction=call_direction,
+        is_repeat=is_repeat,
+        duration=duration
+    )
+
+
+# =============================================================================
+# STRUCTURED OUTPUT SCHEMA (mirrors INSIGHTS_JSON_FORMAT)
+# =============================================================================
+
+_LEVEL = schema_enum("HIGH", "MEDIUM", "LOW")
+_UNDERSTANDING = schema_enum("YES", "PARTIAL", "NO")
+
+
+INSIGHTS_SCHEMA = {
+    "name": "indiamart_call_insights",
+    "schema": schema_object(
+        primary_category=schema_enum(*ISSUE_CATEGORIES, extra="INSUFFICIENT_DATA"),
+        seller_pain_points=schema_object(
+            listing_issues=SCHEMA_STR,
+            payment_delays=SCHEMA_STR,
+            bl_quality_problems=SCHEMA_STR,
+            verification_hurdles=SCHEMA_STR,
+            other_pain_points=SCHEMA_STR_LIST
+        ),
+        seller_undertone=schema_enum(*SELLER_UNDERTONES, extra="INSUFFICIENT_DATA"),
+        sentiment_details=schema_object(
+            urgency_level=_LEVEL,
+            frustration_indicators=SCHEMA_STR_LIST,
+            engagement_quality=_LEVEL,
+            conversation_complexity=schema_enum("SIMPLE", "MODERATE", "COMPLEX")
+        ),
+        churn_risk_assessment=schema_object(
+            risk_level=schema_enum(*CHURN_RISK_LEVELS),
+            churn_signals=SCHEMA_STR_LIST,
+            competitor_mentions=SCHEMA_STR,
+            discontinuation_intent=SCHEMA_BOOL,
+            winback_opportunity=SCHEMA_BOOL
+        ),
+        seller_understanding=schema_object(
+            understands_products=_UNDERSTANDING,
+            understands_seller_panel=_UNDERSTANDING,
+            understands_lms=_UNDERSTANDING,
+            understands_bl_shortlisting=_UNDERSTANDING,
+            understands_diy_catalog=_UNDERSTANDING,
+            needs_base_education=SCHEMA_BOOL,
+            education_topics_needed=SCHEMA_STR_LIST
+        ),
+        catalog_insights=schema_object(
+            cqs_issues=SCHEMA_STR,
+            rank_issues=SCHEMA_STR,
+            mcat_issues=SCHEMA_STR,
+            product_addition_needed=SCHEMA_BOOL,
+            isq_improvement_needed=SCHEMA_BOOL,
+            needs_production_support=SCHEMA_BOOL,
+            production_priority=schema_enum("HIGH", "MEDIUM", "LOW", "NONE")
+        ),
+        opportunities=schema_object(
+            upsell_opportunity=SCHEMA_BOOL,
+            upsell_type=SCHEMA_STR,
+            renewal_opportunity=SCHEMA_BOOL,
+            engaged_but_not_renewing=SCHEMA_BOOL,
+            cross_sell_potential=SCHEMA_STR_LIST
+        ),
+        executive_performance=schema_object(
+            objection_handling=schema_enum("EXCELLENT", "GOOD", "NEEDS_IMPROVEMENT", "POOR"),
+            product_knowledge_displayed=SCHEMA_BOOL,
+            empathy_shown=SCHEMA_BOOL,
+            solution_provided=SCHEMA_BOOL,
+            app_sharing_compliance_checked=SCHEMA_BOOL,
+            followed_process=SCHEMA_BOOL
+        ),
+        action_items=schema_object(
+            immediate_actions=SCHEMA_STR_LIST,
+            follow_up_needed=SCHEMA_BOOL,
+            follow_up_reason=SCHEMA_STR,
+            wc_wm_needed=SCHEMA_BOOL,
+            ticket_required=SCHEMA_BOOL,
+            escalation_needed=SCHEMA_BOOL,
+            production_work_order=SCHEMA_BOOL
+        ),
+        best_reach_method=schema_enum("Email", "WhatsApp", "Seller Panel", "IM App", "DIR", "Help Page", "Phone Call"),
+        top_5_talking_points=SCHEMA_STR_LIST,
+        executive_learnings=SCHEMA_STR_LIST,
+        issue_summary=SCHEMA_STR,
+        proactive_recommendation=SCHEMA_STR
+    )
+}
+
+INSIGHTS_RESPONSE_FORMAT = {"type": "json_schema", "json_schema": INSIGHTS_SCHEMA}
+
+# =============================================================================
+# BATCHED COARSE TRIAGE (several calls per request, headline labels only)
+# =============================================================================
+
+# Max calls per batched request and the transcript budget shared between
+# them, keeping the request well inside the 4096 token context
+TRIAGE_BATCH_SIZE = 4
+TRIAGE_CHAR_BUDGET = 4000
+
+TRIAGE_SYSTEM_PROMPT = f"""You are an expert analyst for IndiaMART's customer service team.
+The user message contains several call transcripts, each starting with a line "=== CALL <n> ===".
+For EVERY call give its headline labels. ONLY use content that is ACTUALLY PRESENT in that call's
+transcript; use "INSUFFICIENT_DATA" when a call is too short or unclear.
+
+Respond ONLY with valid JSON:
+{{"results": [{{"call": <n>, "primary_category": "<{'|'.join(ISSUE_CATEGORIES)}>", "seller_undertone": "<{'|'.join(SELLER_UNDERTONES)}>", "churn_risk": "<{'|'.join(CHURN_RISK_LEVELS)}>"}}]}}"""
+
+TRIAGE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "indiamart_call_triage",
+        "schema": schema_object(
+            results={
+                "type": "array",
+                "items": schema_object(
+                    call={"type": "integer"},
+                    primary_category=schema_enum(*ISSUE_CATEGORIES, extra="INSUFFICIENT_DATA"),
+                    seller_undertone=schema_enum(*SELLER_UNDERTONES, extra="INSUFFICIENT_DATA"),
+                    churn_risk=schema_enum(*CHURN_RISK_LEVELS, extra="INSUFFICIENT_DATA")
+                )
+            }
+        )
+    }
+}
+
+
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+class _JSONFieldScanner:
+    """
+    Incremental scanner for a JSON object arriving in pieces.
+    
+    feed() returns the top-level fields completed by the new text as
+    (key, value) pairs, plus string items of top-level arrays as
+    ("key[i]", item) as soon as each item closes, i being the item's
+    position among all of the array's elements. Text before the opening
+    brace (e.g. a ```json fence) and after the closing brace is ignored.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.state = "key"      # key -> colon -> value -> in_value -> after -> key ...
+        self.key = None
+        self.token_start = None # start of the key string or top-level value
+        self.kind = None        # string | primitive | array | object
+        self.item_start = None
+        self.item_index = 0
+        self.done = False
+    
+    def _emit_value(self, end: int, fields: List[Tuple[str, Any]]):
+        try:
+            fields.append((self.key, json.loads(self.buffer[self.token_start:end])))
+        except ValueError:
+            pass
+        self.token_start = None
+        self.state = "after"
+    
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        fields = []
+        self.buffer += text
+        
+        for i in range(self.pos, len(self.buffer)):
+            if self.done:
+                break
+            ch = self.buffer[i]
+            
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.state == "key":
+                        self.key = json.loads(self.buffer[self.token_start:i + 1])
+                        self.token_start = None
+                        self.state = "colon"
+                    elif self.depth == 1:
+                        self._emit_value(i + 1, fields)
+                    elif self.depth == 2 and self.kind == "array" and self.item_start is not None:
+                        item = json.loads(self.buffer[self.item_start:i + 1])
+                        fields.append((f"{self.key}[{self.item_index}]", item))
+                        self.item_start = None
+                continue
+            
+            if self.depth == 0:
+                if ch == "{":
+                    self.depth = 1
+                continue
+            
+            if ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.state in ("key", "value"):
+                    self.token_start = i
+                    if self.state == "value":
+                        self.kind = "string"
+                        self.state = "in_value"
+                elif self.depth == 2 and self.kind == "array":
+                    self.item_start = i
+            elif ch in "{[":
+                if self.depth == 1 and self.state == "value":
+                    self.token_start = i
+                    self.kind = "array" if ch == "[" else "object"
+                    self.item_index = 0
+                    self.state = "in_value"
+                self.depth += 1
+            elif ch in "}]":
+                if self.depth == 1 and self.state == "in_value" and self.kind == "primitive":
+                    self._emit_value(i, fields)
+                self.depth -= 1
+                if self.depth == 1 and self.state == "in_value":
+                    self._emit_value(i + 1, fields)
+                elif self.depth == 0:
+                    self.done = True
+            elif self.depth == 1:
+                if ch == ":" and self.state == "colon":
+                    self.state = "value"
+                elif ch == ",":
+                    if self.state == "in_value" and self.kind == "primitive":
+                        self._emit_value(i, fields)
+                    self.state = "key"
+                elif not ch.isspace() and self.state == "value":
+                    self.token_start = i
+                    self.kind = "primitive"
+                    self.state = "in_value"
+            elif ch == "," and self.depth == 2 and self.kind == "array":
+                # Every element counts toward the index, not just strings
+                self.item_index += 1
+        
+        self.pos = len(self.buffer)
+        return fields
+
 
 class InsightsAgent:
     """
     IndiaMART Insights Agent - Assists sales/servicing teams with AI-powered insights
     Uses NVIDIA NIM for analysis
+    
+    Every public method has an async twin (suffix _async) for running many
+    requests concurrently; analyze_many fans out over a list of transcripts.
     """
     
-    def __init__(self, api_key: str = None, verbose: bool = True):
+    def __init__(self, api_key: str = None, verbose: bool = True, client: OpenAI = None,
+                 async_clients: AsyncClientCache = None, response_cache: ResponseCache = None,
+                 cache_dir: Optional[str] = INSIGHTS_CACHE_DIR, no_cache: bool = False):
         self.api_key = api_key or NVIDIA_API_KEY
-        self.client = OpenAI(
-            base_url=NVIDIA_BASE_URL,
-            api_key=self.api_key
-        )
+        # Reuse the caller's clients, else the process-wide ones for this key,
+        # so creating agents does not open new connection pools
+        self._client = client
+        self.async_clients = async_clients or get_shared_async_clients(self.api_key)
+        # Exact-match cache: identical prompts (repeat tickets, re-runs) skip the
+        # API call. Kept in cache_dir across runs (None keeps it in memory only);
+        # no_cache=True always asks the model, e.g. for debugging prompts
+        if no_cache:
+            self.response_cache = ResponseCache(0)
+        elif response_cache is not None:
+            self.response_cache = response_cache
+        else:
+            self.response_cache = ResponseCache(cache_dir=cache_dir)
         self.model = NVIDIA_MODEL
         self.verbose = verbose
+        # Flipped off if the endpoint rejects response_format
+        self.structured_output = True
         
         self._log(f"✅ InsightsAgent initialized (NVIDIA NIM)")
         
+    @property
+    def client(self) -> OpenAI:
+        """The caller's client, else the process-wide one (looked up per access, so it survives fork)"""
+        return self._client or get_shared_client(self.api_key)
+    
     def _log(self, message: str):
         if self.verbose:
             print(message)
     
-    def _call_llm(self, prompt: str) -> str:
-        """Call NVIDIA NIM API"""
-        response_text = ""
-        completion = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=MODEL_TEMPERATURE,
-            top_p=MODEL_TOP_P,
-            max_tokens=MODEL_MAX_TOKENS,
-            stream=True
+    def _request(self, prompt: str, system_prompt: str = None) -> Dict[str, Any]:
+        """Common chat.completions.create arguments"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": MODEL_TEMPERATURE,
+            "top_p": MODEL_TOP_P,
+            "max_tokens": MODEL_MAX_TOKENS
+        }
+    
+    def _cache_key(self, prompt: str, system_prompt: str = None, response_format: Dict[str, Any] = None) -> str:
+        # Sampling settings are part of the key: cached responses outlive the process
+        return self.response_cache.key(
+            self.model, str(MODEL_TEMPERATURE), str(MODEL_TOP_P), str(MODEL_MAX_TOKENS),
+            system_prompt or "", prompt, "schema" if response_format else "text"
         )
+    
+    def _call_llm(self, prompt: str, response_format: Dict[str, Any] = None, stream: bool = False,
+                  system_prompt: str = None, parse: bool = False) -> Any:
+        """
+        Call NVIDIA NIM API, answering repeated requests from the response cache
+        
+        With parse=True the reply is returned as a parsed JSON dict, and it is
+        only cached once it parses, so a truncated or malformed reply is
+        re-requested next time instead of being served from the cache.
+        """
+        key = self._cache_key(prompt, system_prompt, response_format)
+        cached = self.response_cache.get(key)
+        response = cached if cached is not None else self._fetch_llm(prompt, response_format, stream, system_prompt)
+        return self._finish_response(key, response, cached is None, parse)
+    
+    async def _call_llm_async(self, prompt: str, response_format: Dict[str, Any] = None,
+                              stream: bool = False, system_prompt: str = None, parse: bool = False) -> Any:
+        """Async version of _call_llm"""
+        key = self._cache_key(prompt, system_prompt, response_format)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            response = cached
+        else:
+            response = await self._fetch_llm_async(prompt, response_format, stream, system_prompt)
+        return self._finish_response(key, response, cached is None, parse)
+    
+    def _finish_response(self, key: str, response: str, fresh: bool, parse: bool) -> Any:
+        """Parse the reply if asked to, then cache it if it was fetched just now"""
+        result = self._parse_json_response(response) if parse else response
+        if fresh and response:
+            self.response_cache.put(key, response)
+        return result
+    
+    def _fetch_llm(self, prompt: str, response_format: Dict[str, Any] = None, stream: bool = False,
+                   system_prompt: str = None) -> str:
+        """
+        Send a request to NVIDIA NIM
+        
+        Callers only use the final text, so the response is fetched in one
+        piece; stream=True is for UIs that want incremental tokens. With a
+        response_format the server constrains the output to the schema.
+        """
+        request = self._request(prompt, system_prompt)
+        
+        if response_format and self.structured_output:
+            try:
+                completion = self.client.chat.completions.create(
+                    **request, response_format=response_format, stream=False
+                )
+                return (completion.choices[0].message.content or "").strip()
+            except BadRequestError as e:
+                if not is_response_format_rejection(e):
+                    raise
+                self._log(f"   ⚠️ Structured output not supported, falling back to free text: {str(e)}")
+                self.structured_output = False
+        
+        if not stream:
+            completion = self.client.chat.completions.create(**request, stream=False)
+            return (completion.choices[0].message.content or "").strip()
+        
+        # Collect deltas in a list and join once instead of growing a string
+        parts = []
+        append = parts.append
+        completion = self.client.chat.completions.create(**request, stream=True)
         
         for chunk in completion:
-            if chunk.choices[0].delta.content is not None:
-                response_text += chunk.choices[0].delta.content
+            delta = chunk.choices[0].delta.content
+            if delta is not None:
+                append(delta)
         
-        return response_text.strip()
+        return "".join(parts).strip()
     
-    def _parse_json_response(self, response: str) -> Dict:
-        """Parse JSON from response"""
-        response = response.strip()
-        if response.startswith("```"):
-            lines = response.split("\n")
-            start_idx = 1
-            end_idx = len(lines)
-            for i, line in enumerate(lines):
-                if i > 0 and line.strip() == "```":
-                    end_idx = i
-                    break
-            response = "\n".join(lines[start_idx:end_idx])
-            if response.startswith("json"):
-                response = response[4:].strip()
-        return json.loads(response)
-    
-    def analyze_transcript(self, transcript: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def _fetch_llm_async(self, prompt: str, response_format: Dict[str, Any] = None,
+                               stream: bool = False, system_prompt: str = None) -> str:
         """
-        Extract comprehensive IndiaMART-specific insights from a transcript
+        Async version of _fetch_llm, bounded by LLM_CONCURRENCY in-flight requests
+        
+        Rate limits, timeouts and 5xx errors are retried with jittered
+        exponential backoff. The concurrency slot is only held while a
+        request is in flight, not while backing off.
         """
-        metadata = metadata or {}
+        client, semaphore = self.async_clients.get()
+        # The SDK's own retries would back off while holding the slot
+        client = client.with_options(max_retries=0)
+        request = self._request(prompt, system_prompt)
+        
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(MAX_RETRIES),
+            wait=retry_wait,
+            retry=retry_if_exception_type(TRANSIENT_ERRORS),
+            reraise=True
+        ):
+            with attempt:
+                async with semaphore:
+                    return await self._fetch_once_async(client, request, response_format, stream)
+    
+    async def _fetch_once_async(self, client, request: Dict[str, Any],
+                                response_format: Dict[str, Any] = None, stream: bool = False) -> str:
+        """Single attempt of _fetch_llm_async"""
+        if response_format and self.structured_output:
+            try:
+                completion = await client.chat.completions.create(
+                    **request, response_format=response_format, stream=False
+                )
+                return (completion.choices[0].message.content or "").strip()
+            except BadRequestError as e:
+                if not is_response_format_rejection(e):
+                    raise
+                self._log(f"   ⚠️ Structured output not supported, falling back to free text: {str(e)}")
+                self.structured_output = False
+        
+        if not stream:
+            completion = await client.chat.completions.create(**request, stream=False)
+            return (completion.choices[0].message.content or "").strip()
+        
+        parts = [delta async for delta in self._stream_deltas(client, request)]
+        return "".join(parts).strip()
+    
+    async def _stream_deltas(self, client, request: Dict[str, Any]) -> AsyncIterator[str]:
+        """Yield the text deltas of a streamed completion"""
+        completion = await client.chat.completions.create(**request, stream=True)
+        
+        async for chunk in completion:
+            delta = chunk.choices[0].delta.content
+            if delta is not None:
+                yield delta
+    
+    def _parse_json_response(self, response: str) -> Dict:
+        """Parse the JSON object in a response, ignoring fences and surrounding text"""
+        try:
+            # Schema-constrained responses are bare JSON
+            return orjson.loads(response)
+        except orjson.JSONDecodeError:
+            pass
         
+        candidate = extract_json_object(response) or response.strip()
+        try:
+            return orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            # The model sometimes leaves trailing commas before } or ]
+            return orjson.loads(_TRAILING_COMMA_RE.sub(r"\1", candidate))
+    
+    def _metadata_block(self, metadata: Dict[str, Any]) -> str:
+        """CALL METADATA block for one call"""
+        return _metadata_block(
+            str(metadata.get('customer_type', 'Unknown')),
+            str(metadata.get('city', 'Unknown')),
+            str(metadata.get('call_direction', 'Unknown')),
+            str(metadata.get('is_repeat', 'Unknown')),
+            str(metadata.get('duration', 'Unknown'))
+        )
+    
+    def _insights_prompt(self, transcript: str, metadata: Dict[str, Any]) -> str:
+        """Build the per-call user message (transcript + call metadata)"""
+        # Limit transcript to ~1500 chars to stay within 4096 token limit
+        return "TRANSCRIPT:\n" + transcript[:1500] + self._metadata_block(metadata)
+    
+    def _short_transcript_result(self, transcript: str) -> Optional[Dict[str, Any]]:
+        """Return a failed result if the transcript is too short to analyze, else None"""
         self._log(f"\n🔍 Analyzing transcript for IndiaMART insights...")
         self._log(f"   Length: {len(transcript)} characters")
         
@@ -220,54 +653,185 @@ class InsightsAgent:
                 'issue_summary': 'Transcript is too short to provide meaningful analysis',
                 'transcript_preview': transcript[:100]
             }
+        return None
+    
+    def _insights_result(self, result: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
+        """Complete the parsed insights response and log the key findings"""
+        result['analysis_success'] = True
+        result['processing_time'] = round(elapsed, 2)
         
-        # Limit transcript to ~1500 chars to stay within 4096 token limit
-        prompt = INSIGHTS_PROMPT.format(
-            transcript=transcript[:1500],
-            customer_type=metadata.get('customer_type', 'Unknown'),
-            city=metadata.get('city', 'Unknown'),
-            call_direction=metadata.get('call_direction', 'Unknown'),
-            is_repeat=metadata.get('is_repeat', 'Unknown'),
-            duration=metadata.get('duration', 'Unknown')
-        )
+        # Log key findings
+        self._log(f"   ✅ Category: {result.get('primary_category', 'N/A')}")
+        self._log(f"   🎭 Undertone: {result.get('seller_undertone', 'N/A')}")
+        self._log(f"   ⚠️  Churn Risk: {result.get('churn_risk_assessment', {}).get('risk_level', 'N/A')}")
+        self._log(f"   ⏱️  Time: {elapsed:.2f}s")
+        
+        if result.get('opportunities', {}).get('upsell_opportunity'):
+            self._log(f"   💰 UPSELL OPPORTUNITY DETECTED!")
+        
+        if result.get('seller_understanding', {}).get('needs_base_education'):
+            self._log(f"   📚 Seller needs BASE EDUCATION")
+        
+        return result
+    
+    def _analysis_error(self, e: Exception) -> Dict[str, Any]:
+        """Failed result for an analysis that raised"""
+        if isinstance(e, json.JSONDecodeError):
+            self._log(f"   ⚠️ JSON Parse Error: {str(e)}")
+        else:
+            self._log(f"   ❌ Error: {str(e)}")
+        return {'analysis_success': False, 'error': str(e), 'primary_category': 'MISCELLANEOUS'}
+    
+    def analyze_transcript(self, transcript: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Extract comprehensive IndiaMART-specific insights from a transcript
+        """
+        short = self._short_transcript_result(transcript)
+        if short:
+            return short
+        
+        prompt = self._insights_prompt(transcript, metadata or {})
         
         try:
             start_time = time.time()
-            response = self._call_llm(prompt)
-            elapsed = time.time() - start_time
-            
-            result = self._parse_json_response(response)
-            result['analysis_success'] = True
-            result['processing_time'] = round(elapsed, 2)
-            
-            # Log key findings
-            self._log(f"   ✅ Category: {result.get('primary_category', 'N/A')}")
-            self._log(f"   🎭 Undertone: {result.get('seller_undertone', 'N/A')}")
-            self._log(f"   ⚠️  Churn Risk: {result.get('churn_risk_assessment', {}).get('risk_level', 'N/A')}")
-            self._log(f"   ⏱️  Time: {elapsed:.2f}s")
-            
-            if result.get('opportunities', {}).get('upsell_opportunity'):
-                self._log(f"   💰 UPSELL OPPORTUNITY DETECTED!")
-            
-            if result.get('seller_understanding', {}).get('needs_base_education'):
-                self._log(f"   📚 Seller needs BASE EDUCATION")
-            
-            return result
+            result = self._call_llm(
+                prompt,
+                response_format=INSIGHTS_RESPONSE_FORMAT,
+                system_prompt=INSIGHTS_SYSTEM_PROMPT,
+                parse=True
+            )
+            return self._insights_result(result, time.time() - start_time)
+        except Exception as e:
+            return self._analysis_error(e)
+    
+    async def analyze_transcript_async(self, transcript: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Async version of analyze_transcript"""
+        short = self._short_transcript_result(transcript)
+        if short:
+            return short
+        
+        prompt = self._insights_prompt(transcript, metadata or {})
+        
+        try:
+            start_time = time.time()
+            result = await self._call_llm_async(
+                prompt,
+                response_format=INSIGHTS_RESPONSE_FORMAT,
+                system_prompt=INSIGHTS_SYSTEM_PROMPT,
+                parse=True
+            )
+            return self._insights_result(result, time.time() - start_time)
+        except Exception as e:
+            return self._analysis_error(e)
+    
+    async def analyze_many(self,
+                           transcripts: List[str],
+                           metadatas: List[Dict[str, Any]] = None,
+                           concurrency: int = None) -> List[Dict[str, Any]]:
+        """
+        Analyze many transcripts concurrently
+        
+        Args:
+            transcripts: Transcript texts
+            metadatas: Optional metadata dict per transcript (same order)
+            concurrency: Optional cap on in-flight analyses, on top of LLM_CONCURRENCY
             
-        except json.JSONDecodeError as e:
-            self._log(f"   ⚠️ JSON Parse Error: {str(e)}")
-            return {'analysis_success': False, 'error': str(e), 'primary_category': 'MISCELLANEOUS'}
+        Returns:
+            Results in the same order as transcripts
+        """
+        metadatas = metadatas or [None] * len(transcripts)
+        limit = asyncio.Semaphore(concurrency) if concurrency else None
+        
+        async def analyze(transcript, metadata):
+            if limit is None:
+                return await self.analyze_transcript_async(transcript, metadata)
+            async with limit:
+                return await self.analyze_transcript_async(transcript, metadata)
+        
+        return await asyncio.gather(*[analyze(t, m) for t, m in zip(transcripts, metadatas)])
+    
+    async def _triage_batch(self, batch: List[Tuple[int, str, Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+        """Label one batch of (position, transcript, metadata) calls with a single request"""
+        per_call = TRIAGE_CHAR_BUDGET // len(batch)
+        prompt = "\n\n".join(
+            f"=== CALL {n} ===\n{transcript[:per_call]}{self._metadata_block(metadata)}"
+            for n, (_, transcript, metadata) in enumerate(batch, 1)
+        )
+        
+        try:
+            parsed = await self._call_llm_async(
+                prompt,
+                response_format=TRIAGE_RESPONSE_FORMAT,
+                system_prompt=TRIAGE_SYSTEM_PROMPT,
+                parse=True
+            )
+            items = parsed.get('results', [])
         except Exception as e:
-            self._log(f"   ❌ Error: {str(e)}")
-            return {'analysis_success': False, 'error': str(e), 'primary_category': 'MISCELLANEOUS'}
+            self._log(f"   ❌ Batch error: {str(e)}")
+            return {}
+        
+        labelled = {}
+        for item in items:
+            n = item.get('call') if isinstance(item, dict) else None
+            if isinstance(n, int) and 1 <= n <= len(batch):
+                churn_risk = item.get('churn_risk', 'NONE')
+                labelled[batch[n - 1][0]] = {
+                    'analysis_success': True,
+                    'primary_category': item.get('primary_category', 'MISCELLANEOUS'),
+                    'seller_undertone': item.get('seller_undertone', 'UNKNOWN'),
+                    'churn_risk': churn_risk,
+                    'churn_risk_assessment': {'risk_level': churn_risk},
+                    'batched': True
+                }
+        return labelled
     
-    def get_executive_popup(self, transcript: str) -> Dict[str, Any]:
+    async def analyze_transcripts_batched(self,
+                                          transcripts: List[str],
+                                          metadatas: List[Dict[str, Any]] = None,
+                                          batch_size: int = TRIAGE_BATCH_SIZE) -> List[Dict[str, Any]]:
         """
-        Generate real-time popup insights for executives during calls
+        Coarse triage of many transcripts: several calls share one request
+        
+        Only the headline labels (primary_category, seller_undertone and
+        churn_risk) are produced; use analyze_many for the full per-call
+        insights. Batches run concurrently.
+        
+        Args:
+            transcripts: Transcript texts
+            metadatas: Optional metadata dict per transcript (same order)
+            batch_size: Calls per request (capped at TRIAGE_BATCH_SIZE)
+            
+        Returns:
+            Results in the same order as transcripts
         """
-        self._log("\n📌 Generating executive popup...")
+        batch_size = max(1, min(batch_size, TRIAGE_BATCH_SIZE))
+        metadatas = metadatas or [None] * len(transcripts)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(transcripts)
+        pending = []
+        
+        for i, (transcript, metadata) in enumerate(zip(transcripts, metadatas)):
+            if not isinstance(transcript, str) or len(transcript.strip()) < 50:
+                results[i] = {
+                    'analysis_success': False,
+                    'error': 'Transcript too short (minimum 50 characters required)',
+                    'primary_category': 'INSUFFICIENT_DATA'
+                }
+            else:
+                pending.append((i, transcript, metadata or {}))
         
-        prompt = f"""Analyze this ongoing IndiaMART call and provide REAL-TIME guidance for the executive.
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        for labelled in await asyncio.gather(*[self._triage_batch(batch) for batch in batches]):
+            for i, result in labelled.items():
+                results[i] = result
+        
+        return [
+            result or {'analysis_success': False, 'error': 'Missing from batch response', 'primary_category': 'MISCELLANEOUS'}
+            for result in results
+        ]
+    
+    def _popup_prompt(self, transcript: str) -> str:
+        """Build the real-time executive popup prompt"""
+        return f"""Analyze this ongoing IndiaMART call and provide REAL-TIME guidance for the executive.
 
 TRANSCRIPT SO FAR:
 {transcript[:1500]}
@@ -287,22 +851,74 @@ Provide a JSON response for the executive popup:
     "upsell_hint": "<if there's an upsell opportunity, mention it>",
     "immediate_action": "<what to do right now>"
 }}"""
-
+    
+    def get_executive_popup(self, transcript: str) -> Dict[str, Any]:
+        """
+        Generate real-time popup insights for executives during calls
+        """
+        self._log("\n📌 Generating executive popup...")
+        
         try:
-            response = self._call_llm(prompt)
-            return self._parse_json_response(response)
+            return self._call_llm(self._popup_prompt(transcript), parse=True)
         except:
             return {"error": "Could not generate popup"}
     
-    def get_daily_learnings(self, transcripts: List[str]) -> Dict[str, Any]:
+    async def get_executive_popup_async(self, transcript: str) -> Dict[str, Any]:
+        """Async version of get_executive_popup"""
+        self._log("\n📌 Generating executive popup...")
+        
+        try:
+            return await self._call_llm_async(self._popup_prompt(transcript), parse=True)
+        except Exception:
+            return {"error": "Could not generate popup"}
+    
+    async def get_executive_popup_stream(self, transcript: str) -> AsyncIterator[Tuple[str, Any]]:
         """
-        Generate Top 5 learnings from today's calls for executives
+        Stream the executive popup, yielding (field, value) pairs as soon as each
+        field is complete so the UI can show the first hints early.
+        
+        Talking points are also yielded one by one as "top_5_talking_points[i]".
+        The last pair is ("popup", <full dict>), or ("error", <message>) if the
+        complete response could not be parsed.
         """
-        self._log("\n📚 Generating daily learnings...")
+        self._log("\n📌 Streaming executive popup...")
         
+        client, semaphore = self.async_clients.get()
+        request = self._request(self._popup_prompt(transcript))
+        scanner = _JSONFieldScanner()
+        parts = []
+        # The response is read by a separate task into this queue (None marks
+        # the end), so a slow consumer does not hold a concurrency slot
+        fields = asyncio.Queue()
+        
+        async def read():
+            try:
+                async with semaphore:
+                    async for delta in self._stream_deltas(client, request):
+                        parts.append(delta)
+                        for field in scanner.feed(delta):
+                            fields.put_nowait(field)
+                fields.put_nowait(("popup", self._parse_json_response("".join(parts))))
+            except Exception:
+                fields.put_nowait(("error", "Could not generate popup"))
+            fields.put_nowait(None)
+        
+        reader = asyncio.ensure_future(read())
+        try:
+            while True:
+                field = await fields.get()
+                if field is None:
+                    break
+                yield field
+        finally:
+            # Stop reading if the consumer gave up early
+            reader.cancel()
+    
+    def _learnings_prompt(self, transcripts: List[str]) -> str:
+        """Build the daily learnings prompt"""
         combined = "\n---\n".join(transcripts[:10])
         
-        prompt = f"""Analyze these IndiaMART customer service calls from today and provide learnings for executives.
+        return f"""Analyze these IndiaMART customer service calls from today and provide learnings for executives.
 
 TODAY'S CALLS:
 {combined[:15000]}
@@ -320,16 +936,30 @@ Provide a JSON response:
     "best_practices_observed": ["<what worked well>"],
     "training_recommendations": ["<suggested training topics>"]
 }}"""
-
+    
+    def get_daily_learnings(self, transcripts: List[str]) -> Dict[str, Any]:
+        """
+        Generate Top 5 learnings from today's calls for executives
+        """
+        self._log("\n📚 Generating daily learnings...")
+        
         try:
-            response = self._call_llm(prompt)
-            return self._parse_json_response(response)
+            return self._call_llm(self._learnings_prompt(transcripts), parse=True)
         except:
             return {"error": "Could not generate learnings"}
     
-    def ask_question(self, transcript: str, question: str) -> str:
-        """Ask a specific question about the transcript"""
-        prompt = f"""Based on this IndiaMART call transcript, answer the question.
+    async def get_daily_learnings_async(self, transcripts: List[str]) -> Dict[str, Any]:
+        """Async version of get_daily_learnings"""
+        self._log("\n📚 Generating daily learnings...")
+        
+        try:
+            return await self._call_llm_async(self._learnings_prompt(transcripts), parse=True)
+        except Exception:
+            return {"error": "Could not generate learnings"}
+    
+    def _question_prompt(self, transcript: str, question: str) -> str:
+        """Build the transcript Q&A prompt"""
+        return f"""Based on this IndiaMART call transcript, answer the question.
 
 CRITICAL: ONLY use information that is ACTUALLY PRESENT in the transcript below.
 DO NOT make up, imagine, or invent any content that is not in the transcript.
@@ -341,8 +971,17 @@ TRANSCRIPT:
 QUESTION: {question}
 
 Provide a clear, factual answer based ONLY on the transcript content."""
-
+    
+    def ask_question(self, transcript: str, question: str) -> str:
+        """Ask a specific question about the transcript"""
+        try:
+            return self._call_llm(self._question_prompt(transcript, question))
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
+    async def ask_question_async(self, transcript: str, question: str) -> str:
+        """Async version of ask_question"""
         try:
-            return self._call_llm(prompt)
+            return await self._call_llm_async(self._question_prompt(transcript, question))
         except Exception as e:
             return f"Error: {str(e)}"
@@ -4,18 +4,52 @@ Aggregates classified call data to produce actionable business insights
 """
 
 import os
-import json
+import re
+import ast
+import orjson
 import pandas as pd
 import numpy as np
 from collections import Counter, defaultdict
+from itertools import chain
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Tuple
 
-from src.config import ISSUE_CATEGORIES
+from src.config import ISSUE_CATEGORY_NAMES
 
 # =============================================================================
 # AGGREGATION FUNCTIONS
 # =============================================================================
 
+# Low-cardinality label columns, stored as category codes for faster
+# comparisons, value_counts and groupby
+CATEGORICAL_COLUMNS = [
+    'ai_primary_category', 'customer_type', 'ai_churn_risk', 'ai_sentiment',
+    'ai_resolution_status', 'is_ticket_repeat60d', 'city_name'
+]
+
+
+def _counts(series: pd.Series) -> pd.Series:
+    """value_counts without the zero rows categorical columns report for unused categories"""
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+
+def _pain_point_list(points: Any) -> List[Any]:
+    """Normalize a pain-points cell: a list, a stringified list, or a single point"""
+    if isinstance(points, list):
+        return points
+    if isinstance(points, str):
+        if not points.startswith('['):
+            return [points]
+        try:
+            parsed = ast.literal_eval(points)
+        except (ValueError, SyntaxError):
+            return []
+        return list(parsed) if isinstance(parsed, (list, tuple)) else []
+    return []
+
+
 class InsightsAggregator:
     """
     Aggregates classified call data to produce business insights
@@ -28,64 +62,109 @@ class InsightsAggregator:
         Args:
             df: DataFrame with classification results (ai_* columns)
         """
-        self.df = df
+        self.df = df.astype({col: 'category' for col in CATEGORICAL_COLUMNS if col in df.columns})
         self.insights = {}
+    
+    # Shared primitives, computed once and reused by every aggregation
+    
+    @cached_property
+    def _category_counts(self) -> pd.Series:
+        return _counts(self.df['ai_primary_category'])
+    
+    @cached_property
+    def _repeat_rate(self) -> float:
+        return int((self.df['is_ticket_repeat60d'] == 'Yes').sum()) / len(self.df) * 100
+    
+    @cached_property
+    def _customer_type_groups(self) -> Dict[Any, pd.DataFrame]:
+        return dict(tuple(self.df.groupby('customer_type', sort=False, observed=True)))
+    
+    @cached_property
+    def _city_groups(self) -> Dict[Any, pd.DataFrame]:
+        return dict(tuple(self.df.groupby('city_name', sort=False, observed=True)))
+    
+    @cached_property
+    def _city_avg_duration(self) -> Dict[Any, float]:
+        """Mean call duration per city, all cities in one groupby"""
+        durations = self.df.groupby('city_name', sort=False, observed=True)['call_duration'].mean()
+        return durations.round(2).to_dict()
+    
+    @cached_property
+    def _customer_type_repeat_rate(self) -> Dict[Any, float]:
+        """Repeat ticket rate (%) per customer type, all types in one groupby"""
+        by_type = (self.df['is_ticket_repeat60d'] == 'Yes').groupby(
+            self.df['customer_type'], sort=False, observed=True
+        )
+        return (by_type.sum() / by_type.size() * 100).round(2).to_dict()
+    
+    def _customer_type_df(self, ctype) -> pd.DataFrame:
+        """Rows for one customer type (empty for values groupby drops, e.g. NaN)"""
+        return self._customer_type_groups.get(ctype, self.df.iloc[0:0])
         
     def aggregate_by_category(self) -> Dict[str, Dict]:
         """Aggregate insights by issue category"""
+        self.insights['category_distribution'] = self._category_distribution()
+        return self.insights['category_distribution']
+    
+    def _category_distribution(self) -> Dict[str, Dict]:
         category_stats = {}
         
         if 'ai_primary_category' in self.df.columns:
-            category_counts = self.df['ai_primary_category'].value_counts()
+            category_counts = self._category_counts
             total = len(self.df)
             
             for category, count in category_counts.items():
                 category_stats[category] = {
                     'count': int(count),
                     'percentage': round(count / total * 100, 2),
-                    'category_name': ISSUE_CATEGORIES.get(category, {}).get('name', category)
+                    'category_name': ISSUE_CATEGORY_NAMES.get(category, category)
                 }
         
-        self.insights['category_distribution'] = category_stats
         return category_stats
     
     def aggregate_by_geography(self) -> Dict[str, Dict]:
         """Aggregate insights by city/geography"""
+        self.insights['geography_insights'] = self._geography_insights()
+        return self.insights['geography_insights']
+    
+    def _geography_insights(self) -> Dict[str, Dict]:
         geo_insights = {}
         
         if 'city_name' in self.df.columns and 'ai_primary_category' in self.df.columns:
-            city_counts = self.df['city_name'].value_counts().head(20)
+            city_counts = _counts(self.df['city_name']).head(20)
             
             for city in city_counts.index:
-                city_df = self.df[self.df['city_name'] == city]
+                city_df = self._city_groups[city]
                 
                 geo_insights[city] = {
                     'total_calls': int(len(city_df)),
-                    'top_issues': city_df['ai_primary_category'].value_counts().head(3).to_dict() if 'ai_primary_category' in city_df else {},
-                    'churn_risk_high': int(len(city_df[city_df.get('ai_churn_risk', '') == 'HIGH'])) if 'ai_churn_risk' in city_df else 0,
-                    'avg_call_duration': round(city_df['call_duration'].mean(), 2) if 'call_duration' in city_df else 0
+                    'top_issues': _counts(city_df['ai_primary_category']).head(3).to_dict() if 'ai_primary_category' in city_df else {},
+                    'churn_risk_high': int((city_df['ai_churn_risk'] == 'HIGH').sum()) if 'ai_churn_risk' in city_df else 0,
+                    'avg_call_duration': self._city_avg_duration[city] if 'call_duration' in city_df else 0
                 }
         
-        self.insights['geography_insights'] = geo_insights
         return geo_insights
     
     def aggregate_by_customer_type(self) -> Dict[str, Dict]:
         """Aggregate insights by customer type"""
+        self.insights['customer_type_insights'] = self._customer_type_insights()
+        return self.insights['customer_type_insights']
+    
+    def _customer_type_insights(self) -> Dict[str, Dict]:
         customer_insights = {}
         
         if 'customer_type' in self.df.columns:
             for ctype in self.df['customer_type'].unique():
-                ctype_df = self.df[self.df['customer_type'] == ctype]
+                ctype_df = self._customer_type_df(ctype)
                 
                 customer_insights[ctype] = {
                     'total_calls': int(len(ctype_df)),
-                    'top_issues': ctype_df['ai_primary_category'].value_counts().head(5).to_dict() if 'ai_primary_category' in ctype_df else {},
-                    'repeat_ticket_rate': round(len(ctype_df[ctype_df['is_ticket_repeat60d'] == 'Yes']) / len(ctype_df) * 100, 2) if 'is_ticket_repeat60d' in ctype_df and len(ctype_df) > 0 else 0,
-                    'sentiment_distribution': ctype_df['ai_sentiment'].value_counts().to_dict() if 'ai_sentiment' in ctype_df else {},
-                    'churn_risk_distribution': ctype_df['ai_churn_risk'].value_counts().to_dict() if 'ai_churn_risk' in ctype_df else {}
+                    'top_issues': _counts(ctype_df['ai_primary_category']).head(5).to_dict() if 'ai_primary_category' in ctype_df else {},
+                    'repeat_ticket_rate': self._customer_type_repeat_rate.get(ctype, 0) if 'is_ticket_repeat60d' in ctype_df else 0,
+                    'sentiment_distribution': _counts(ctype_df['ai_sentiment']).to_dict() if 'ai_sentiment' in ctype_df else {},
+                    'churn_risk_distribution': _counts(ctype_df['ai_churn_risk']).to_dict() if 'ai_churn_risk' in ctype_df else {}
                 }
         
-        self.insights['customer_type_insights'] = customer_insights
         return customer_insights
     
     def identify_systemic_issues(self) -> List[Dict]:
@@ -93,7 +172,7 @@ class InsightsAggregator:
         systemic_issues = []
         
         if 'ai_primary_category' in self.df.columns:
-            category_counts = self.df['ai_primary_category'].value_counts()
+            category_counts = self._category_counts
             for category, count in category_counts.head(5).items():
                 if count > len(self.df) * 0.1:
                     systemic_issues.append({
@@ -101,11 +180,11 @@ class InsightsAggregator:
                         'category': category,
                         'count': int(count),
                         'percentage': round(count / len(self.df) * 100, 2),
-                        'recommendation': f"Implement proactive solution for {ISSUE_CATEGORIES.get(category, {}).get('name', category)} - affects {round(count / len(self.df) * 100, 1)}% of calls"
+                        'recommendation': f"Implement proactive solution for {ISSUE_CATEGORY_NAMES.get(category, category)} - affects {round(count / len(self.df) * 100, 1)}% of calls"
                     })
         
         if 'is_ticket_repeat60d' in self.df.columns:
-            repeat_rate = len(self.df[self.df['is_ticket_repeat60d'] == 'Yes']) / len(self.df) * 100
+            repeat_rate = self._repeat_rate
             if repeat_rate > 30:
                 systemic_issues.append({
                     'type': 'HIGH_REPEAT_RATE',
@@ -115,9 +194,9 @@ class InsightsAggregator:
         
         if 'ai_churn_risk' in self.df.columns and 'customer_type' in self.df.columns:
             for ctype in self.df['customer_type'].unique():
-                ctype_df = self.df[self.df['customer_type'] == ctype]
+                ctype_df = self._customer_type_df(ctype)
                 if len(ctype_df) > 50:
-                    high_churn = len(ctype_df[ctype_df['ai_churn_risk'] == 'HIGH'])
+                    high_churn = int((ctype_df['ai_churn_risk'] == 'HIGH').sum())
                     if high_churn / len(ctype_df) > 0.15:
                         systemic_issues.append({
                             'type': 'HIGH_CHURN_SEGMENT',
@@ -131,30 +210,32 @@ class InsightsAggregator:
     
     def extract_pain_points(self) -> Dict[str, int]:
         """Extract common customer pain points"""
+        self.insights['top_pain_points'] = self._top_pain_points()
+        return dict(self.insights['top_pain_points'])
+    
+    def _top_pain_points(self) -> Dict[str, int]:
         pain_points = Counter()
         
         if 'ai_customer_pain_points' in self.df.columns:
-            for points in self.df['ai_customer_pain_points'].dropna():
-                if isinstance(points, list):
-                    for point in points:
-                        pain_points[point.lower().strip()] += 1
-                elif isinstance(points, str):
-                    try:
-                        points_list = eval(points) if points.startswith('[') else [points]
-                        for point in points_list:
-                            pain_points[point.lower().strip()] += 1
-                    except:
-                        pass
+            point_lists = self.df['ai_customer_pain_points'].dropna().map(_pain_point_list)
+            pain_points.update(
+                point.lower().strip()
+                for point in chain.from_iterable(point_lists)
+                if isinstance(point, str)
+            )
         
-        self.insights['top_pain_points'] = dict(pain_points.most_common(20))
         return dict(pain_points.most_common(20))
     
     def analyze_resolution_patterns(self) -> Dict[str, Any]:
         """Analyze resolution patterns and effectiveness"""
+        self.insights['resolution_analysis'] = self._resolution_analysis()
+        return self.insights['resolution_analysis']
+    
+    def _resolution_analysis(self) -> Dict[str, Any]:
         resolution_analysis = {}
         
         if 'ai_resolution_status' in self.df.columns:
-            resolution_dist = self.df['ai_resolution_status'].value_counts().to_dict()
+            resolution_dist = _counts(self.df['ai_resolution_status']).to_dict()
             total = sum(resolution_dist.values())
             
             resolution_analysis = {
@@ -164,15 +245,18 @@ class InsightsAggregator:
             }
             
             if 'ai_primary_category' in self.df.columns:
-                category_resolution = {}
-                for category in self.df['ai_primary_category'].unique():
-                    cat_df = self.df[self.df['ai_primary_category'] == category]
-                    resolved = len(cat_df[cat_df['ai_resolution_status'] == 'RESOLVED'])
-                    category_resolution[category] = round(resolved / len(cat_df) * 100, 2) if len(cat_df) > 0 else 0
-                
-                resolution_analysis['resolution_by_category'] = category_resolution
+                # One grouped mean instead of a filter per category; categories
+                # groupby drops (NaN) report 0 as before
+                resolved_rate = (
+                    (self.df['ai_resolution_status'] == 'RESOLVED')
+                    .groupby(self.df['ai_primary_category'], sort=False, observed=True)
+                    .mean()
+                    .reindex(self.df['ai_primary_category'].unique(), fill_value=0)
+                )
+                resolution_analysis['resolution_by_category'] = {
+                    category: round(rate * 100, 2) for category, rate in resolved_rate.items()
+                }
         
-        self.insights['resolution_analysis'] = resolution_analysis
         return resolution_analysis
     
     def generate_actionable_recommendations(self) -> List[Dict]:
@@ -186,14 +270,14 @@ class InsightsAggregator:
                 recommendations.append({
                     'priority': 1,
                     'category': 'Process Improvement',
-                    'issue': f"High volume of {ISSUE_CATEGORIES.get(top_category[0], {}).get('name', top_category[0])} issues",
+                    'issue': f"High volume of {ISSUE_CATEGORY_NAMES.get(top_category[0], top_category[0])} issues",
                     'action': f"Create dedicated playbook and training for handling {top_category[0]} issues. Consider self-service options.",
                     'impact': f"Could reduce {top_category[1]['percentage']}% of call volume",
                     'effort': 'Medium'
                 })
         
         if 'is_ticket_repeat60d' in self.df.columns:
-            repeat_rate = len(self.df[self.df['is_ticket_repeat60d'] == 'Yes']) / len(self.df) * 100
+            repeat_rate = self._repeat_rate
             if repeat_rate > 25:
                 recommendations.append({
                     'priority': 2,
@@ -205,7 +289,7 @@ class InsightsAggregator:
                 })
         
         if 'ai_churn_risk' in self.df.columns:
-            high_churn = len(self.df[self.df['ai_churn_risk'] == 'HIGH'])
+            high_churn = int((self.df['ai_churn_risk'] == 'HIGH').sum())
             if high_churn > 0:
                 recommendations.append({
                     'priority': 3,
@@ -244,23 +328,29 @@ class InsightsAggregator:
     
     def generate_full_report(self) -> Dict[str, Any]:
         """Generate comprehensive insights report"""
-        print("Aggregating by category...")
-        self.aggregate_by_category()
-        
-        print("Aggregating by geography...")
-        self.aggregate_by_geography()
-        
-        print("Aggregating by customer type...")
-        self.aggregate_by_customer_type()
+        # Independent stages run on threads (pandas releases the GIL in most
+        # of their reductions); submit everything before waiting on any result,
+        # then store the results in a fixed order so the report keys are stable
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            category, geography, customer_type, pain_points, resolution = [
+                pool.submit(stage) for stage in (
+                    self._category_distribution,
+                    self._geography_insights,
+                    self._customer_type_insights,
+                    self._top_pain_points,
+                    self._resolution_analysis
+                )
+            ]
+        
+        self.insights['category_distribution'] = category.result()
+        self.insights['geography_insights'] = geography.result()
+        self.insights['customer_type_insights'] = customer_type.result()
         
         print("Identifying systemic issues...")
         self.identify_systemic_issues()
         
-        print("Extracting pain points...")
-        self.extract_pain_points()
-        
-        print("Analyzing resolution patterns...")
-        self.analyze_resolution_patterns()
+        self.insights['top_pain_points'] = pain_points.result()
+        self.insights['resolution_analysis'] = resolution.result()
         
         print("Generating recommendations...")
         self.generate_actionable_recommendations()
@@ -274,29 +364,19 @@ class InsightsAggregator:
                 'end': str(self.df['call_entered_on'].max()) if 'call_entered_on' in self.df else 'N/A'
             },
             'avg_call_duration': round(self.df['call_duration'].mean(), 2) if 'call_duration' in self.df else 0,
-            'repeat_ticket_rate': round(len(self.df[self.df['is_ticket_repeat60d'] == 'Yes']) / len(self.df) * 100, 2) if 'is_ticket_repeat60d' in self.df else 0
+            'repeat_ticket_rate': round(self._repeat_rate, 2) if 'is_ticket_repeat60d' in self.df else 0
         }
         
         return self.insights
     
     def save_report(self, filepath: str):
         """Save insights report to JSON file"""
-        def convert_types(obj):
-            if isinstance(obj, dict):
-                return {k: convert_types(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_types(i) for i in obj]
-            elif isinstance(obj, (np.int64, np.int32)):
-                return int(obj)
-            elif isinstance(obj, (np.float64, np.float32)):
-                return float(obj)
-            else:
-                return obj
-        
-        clean_insights = convert_types(self.insights)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(clean_insights, f, ensure_ascii=False, indent=2)
+        # orjson serializes numpy scalars natively, no pre-conversion pass needed
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(
+                self.insights,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ))
         
         print(f"Report saved to {filepath}")
 
@@ -305,49 +385,61 @@ class InsightsAggregator:
 # QUICK INSIGHTS FROM EXISTING SUMMARY
 # =============================================================================
 
+# Summary section patterns, compiled once
+_SENTIMENT_RE = re.compile(r'@@@Sentiment:(.*?)(?:@@@|$)', re.DOTALL)
+_TOPICS_RE = re.compile(
+    r'\A(?:(?!@@@Key Topics:).)*@@@Key Topics:(?:(?!@@@Key Topics:)[^\n])*\n((?:(?!@@@Key Topics:)[^\n])*)',
+    re.DOTALL
+)
+_ALERT_RE = re.compile(r'Alert \(If Any\):(.*?)(?:@@@|Alert \(If Any\):|$)', re.DOTALL)
+
+
 def quick_insights_from_summary(df: pd.DataFrame) -> Dict[str, Any]:
     """
     Extract quick insights from existing summary column without Gemini
     Uses pattern matching on the already available summaries
     """
+    if 'summary' in df.columns:
+        summaries = df['summary'].astype(str)
+    else:
+        summaries = pd.Series('', index=df.index, dtype=str)
+    
+    # Sentiment: text between '@@@Sentiment:' and the next '@@@'
+    sentiment_part = summaries.str.extract(_SENTIMENT_RE, expand=False).dropna()
+    sentiment = pd.Series(
+        np.select(
+            [sentiment_part.str.contains('Positive', regex=False),
+             sentiment_part.str.contains('Negative', regex=False)],
+            ['Positive', 'Negative'],
+            default='Neutral'
+        ),
+        dtype=object
+    )
+    
+    # Key topics: comma separated list on the line after '@@@Key Topics:'
+    topics = (
+        summaries.str.extract(_TOPICS_RE, expand=False)
+        .dropna()
+        .str.split(',')
+        .explode()
+        .str.strip()
+    )
+    topics = topics[topics.str.len() > 2].str.lower()
+    
+    # Alerts: text after 'Alert (If Any):' that is non-empty and not 'None'
+    alert_part = summaries.str.extract(_ALERT_RE, expand=False).dropna()
+    alert_calls = int((~alert_part.str.contains('None', regex=False) & (alert_part.str.strip() != '')).sum())
+    
     insights = {
         'total_calls': len(df),
-        'sentiment_distribution': {},
-        'key_topics': Counter(),
+        'sentiment_distribution': {k: int(v) for k, v in sentiment.value_counts().items()},
+        # Stable sort keeps first-seen order among ties, like Counter.most_common
+        'key_topics': {
+            k: int(v) for k, v in
+            topics.value_counts(sort=False).sort_values(ascending=False, kind='stable').head(30).items()
+        },
         'concerns_patterns': Counter(),
-        'alert_calls': 0
+        'alert_calls': alert_calls
     }
     
-    for idx, row in df.iterrows():
-        summary = str(row.get('summary', ''))
-        
-        if '@@@Sentiment:' in summary:
-            try:
-                sentiment_part = summary.split('@@@Sentiment:')[1].split('@@@')[0]
-                if 'Positive' in sentiment_part:
-                    insights['sentiment_distribution']['Positive'] = insights['sentiment_distribution'].get('Positive', 0) + 1
-                elif 'Negative' in sentiment_part:
-                    insights['sentiment_distribution']['Negative'] = insights['sentiment_distribution'].get('Negative', 0) + 1
-                else:
-                    insights['sentiment_distribution']['Neutral'] = insights['sentiment_distribution'].get('Neutral', 0) + 1
-            except:
-                pass
-        
-        if '@@@Key Topics:' in summary:
-            try:
-                topics_part = summary.split('@@@Key Topics:')[1].split('\n')[1]
-                topics = [t.strip() for t in topics_part.split(',')]
-                for topic in topics:
-                    if topic and len(topic) > 2:
-                        insights['key_topics'][topic.lower()] += 1
-            except:
-                pass
-        
-        if 'Alert (If Any):' in summary:
-            alert_part = summary.split('Alert (If Any):')[1].split('@@@')[0]
-            if 'None' not in alert_part and alert_part.strip():
-                insights['alert_calls'] += 1
-    
-    insights['key_topics'] = dict(insights['key_topics'].most_common(30))
-    
     return insights
@@ -5,13 +5,17 @@ Handles batch processing of 5600+ transcripts with rate limiting and error handl
 """
 
 import os
-import json
+import re
 import time
+import string
+import asyncio
+import orjson
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
 from tqdm import tqdm
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+from openai import OpenAI, BadRequestError, RateLimitError
+from tenacity import retry, AsyncRetrying, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from src.config import (
     ISSUE_CATEGORIES, 
@@ -22,7 +26,34 @@ from src.config import (
     MODEL_TOP_P,
     MODEL_MAX_TOKENS,
     BATCH_SIZE, 
-    MAX_RETRIES
+    MAX_RETRIES,
+    RETRY_DELAY,
+    CLASSIFY_CONCURRENCY,
+    CLASSIFY_REQUESTS_PER_MINUTE,
+    CLASSIFY_TRANSCRIPT_MAX_BYTES,
+    CLASSIFY_MIN_TRANSCRIPT_CHARS,
+    CLASSIFY_MIN_DURATION_SECONDS,
+    CLASSIFY_MULTI_SIZE,
+    CLASSIFY_MULTI_MAX_CHARS,
+    CLASSIFY_RATE_LIMIT_PAUSE,
+    CLASSIFICATION_CACHE_DIR
+)
+from src.utils.llm_client import (
+    AsyncClientCache,
+    AsyncRateLimiter,
+    DiskCache,
+    get_shared_client,
+    TRANSIENT_ERRORS,
+    retry_wait,
+    rate_limit_delay,
+    is_response_format_rejection,
+    extract_json_object,
+    schema_enum,
+    schema_object,
+    SCHEMA_STR,
+    SCHEMA_BOOL,
+    SCHEMA_STR_LIST,
+    run_sync
 )
 
 # =============================================================================
@@ -87,6 +118,197 @@ IMPORTANT GUIDELINES:
 Respond ONLY with valid JSON, no additional text."""
 
 
+# JSON schema of the CLASSIFICATION_PROMPT output. Sent as response_format so
+# the server constrains decoding to it: no code fences, no unparseable replies.
+# Every label may also be INSUFFICIENT_DATA, as the prompt's rules allow.
+def _label_enum(*values) -> Dict[str, Any]:
+    return schema_enum(*values, extra="INSUFFICIENT_DATA")
+
+
+_CATEGORY = _label_enum(
+    "LEAD_QUALITY", "PAYMENT_BILLING", "CATALOG_MANAGEMENT", "SUBSCRIPTION_RENEWAL",
+    "TECHNICAL_ISSUES", "BUYLEAD_CONSUMPTION", "ACCOUNT_MANAGEMENT", "SERVICE_ESCALATION",
+    "ONBOARDING_TRAINING", "CANCELLATION_CHURN", "COMPETITOR_MENTION", "POSITIVE_FEEDBACK",
+    "FOLLOW_UP_REQUIRED", "MISCELLANEOUS"
+)
+
+_CLASSIFICATION_PROPERTIES = dict(
+    primary_category=_CATEGORY,
+    secondary_categories={"type": "array", "items": _CATEGORY},
+    issue_summary=SCHEMA_STR,
+    customer_pain_points=SCHEMA_STR_LIST,
+    resolution_status=_label_enum("RESOLVED", "PARTIALLY_RESOLVED", "UNRESOLVED", "ESCALATED", "CALLBACK_SCHEDULED"),
+    sentiment=_label_enum("VERY_NEGATIVE", "NEGATIVE", "NEUTRAL", "POSITIVE", "VERY_POSITIVE"),
+    sentiment_shift=_label_enum("IMPROVED", "DECLINED", "STABLE"),
+    urgency=_label_enum("CRITICAL", "HIGH", "MEDIUM", "LOW"),
+    churn_risk=_label_enum("HIGH", "MEDIUM", "LOW", "NONE"),
+    executive_performance=schema_object(
+        empathy_shown=SCHEMA_BOOL,
+        solution_offered=SCHEMA_BOOL,
+        followed_process=SCHEMA_BOOL,
+        escalation_needed=SCHEMA_BOOL
+    ),
+    actionable_insight=SCHEMA_STR,
+    keywords=SCHEMA_STR_LIST,
+    requires_follow_up=SCHEMA_BOOL,
+    follow_up_reason=SCHEMA_STR
+)
+
+CLASSIFICATION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "indiamart_call_classification",
+        "schema": schema_object(**_CLASSIFICATION_PROPERTIES)
+    }
+}
+
+# Defaults for container fields a response leaves out, so every result has
+# the same shape for flatten_classification_results and the DataFrame
+_CONTAINER_DEFAULTS = tuple(
+    (field, list if spec["type"] == "array" else dict)
+    for field, spec in _CLASSIFICATION_PROPERTIES.items()
+    if spec["type"] in ("array", "object")
+)
+
+MULTI_CLASSIFICATION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "indiamart_call_classifications",
+        "schema": schema_object(
+            results={
+                "type": "array",
+                "items": schema_object(call={"type": "integer"}, **_CLASSIFICATION_PROPERTIES)
+            }
+        )
+    }
+}
+
+
+def _prompt_section(start: str, end: str) -> str:
+    """The part of CLASSIFICATION_PROMPT from marker start up to marker end"""
+    begin = CLASSIFICATION_PROMPT.index(start)
+    return CLASSIFICATION_PROMPT[begin:CLASSIFICATION_PROMPT.index(end, begin)].strip()
+
+
+def _segments(template: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """Template pre-split into (literal text, placeholder) segments"""
+    return tuple((literal, field) for literal, field, _, _ in string.Formatter().parse(template))
+
+
+def _fill(segments: Tuple[Tuple[str, Optional[str]], ...], values: Dict[str, Any]) -> str:
+    """Equivalent to template.format(**values), as a single join"""
+    return "".join([
+        literal + str(values[field]) if field is not None else literal
+        for literal, field in segments
+    ])
+
+
+# CLASSIFICATION_PROMPT pre-split, so filling it is a join instead of
+# re-parsing the template on every call
+_PROMPT_SEGMENTS = _segments(CLASSIFICATION_PROMPT)
+
+
+def _fill_prompt(values: Dict[str, Any]) -> str:
+    """Equivalent to CLASSIFICATION_PROMPT.format(**values)"""
+    return _fill(_PROMPT_SEGMENTS, values)
+
+
+# =============================================================================
+# MULTI-CALL PROMPT (several short calls classified in one request)
+# =============================================================================
+
+# Same rules, output fields and per-call details as CLASSIFICATION_PROMPT
+_CALL_SEGMENTS = _segments(_prompt_section("TRANSCRIPT:", "Analyze this transcript"))
+
+MULTI_CLASSIFICATION_PROMPT_HEADER = (
+    "You are an expert customer service analyst for IndiaMART, India's largest B2B marketplace.\n"
+    "Below are several call transcripts (in Hinglish - Hindi-English mix), each starting with a line "
+    "\"=== CALL <n> ===\". Analyze EVERY call independently and extract structured insights.\n\n"
+    + _prompt_section("CRITICAL RULES:", "TRANSCRIPT:").replace("the transcript below", "that call's transcript")
+    + "\n\nRespond with a JSON object {\"results\": [...]} holding one object per call, each with "
+    "\"call\": <n> plus the following structure:\n\n"
+    + _prompt_section("{{", "IMPORTANT GUIDELINES:").replace("{{", "{").replace("}}", "}")
+    + "\n\n" + _prompt_section("IMPORTANT GUIDELINES:", "Respond ONLY")
+    + "\n\nRespond ONLY with valid JSON, no additional text.\n\n"
+)
+
+
+async def _group_member(group: asyncio.Future, n: int) -> Dict[str, Any]:
+    """Result of the n-th call of a multi-call request"""
+    return (await group)[n]
+
+
+def _truncate_to_bytes(text: str, max_bytes: int) -> str:
+    """Cut text to at most max_bytes of UTF-8 without splitting a character"""
+    if text.isascii():
+        return text[:max_bytes]
+    return text.encode('utf-8')[:max_bytes].decode('utf-8', errors='ignore')
+
+
+def _columns(df: pd.DataFrame, defaults: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """
+    Columns as plain lists (default value for missing columns), so per-record
+    loops index by position instead of building a Series per row
+    """
+    return {
+        col: df[col].tolist() if col in df.columns else [default] * len(df)
+        for col, default in defaults.items()
+    }
+
+
+# Low-cardinality label fields, stored as category dtype in result frames:
+# codes instead of one Python string per row, faster value_counts/groupby
+CATEGORICAL_RESULT_FIELDS = (
+    'primary_category', 'sentiment', 'sentiment_shift', 'urgency', 'churn_risk', 'resolution_status'
+)
+
+
+def _with_categories(df: pd.DataFrame, prefix: str = '') -> pd.DataFrame:
+    """df with its CATEGORICAL_RESULT_FIELDS columns (named prefix + field) as category dtype"""
+    columns = [prefix + field for field in CATEGORICAL_RESULT_FIELDS]
+    return df.astype({col: 'category' for col in columns if col in df.columns})
+
+
+# Error text of a rate-limited request (429, "rate limit", quota exceeded);
+# whole words only (rate_limit_exceeded counts), so "rated", "limitation" or
+# "4290" don't pause the limiter
+_RATE_LIMIT_RE = re.compile(
+    r"(?<![a-z0-9])(?:rate[ _-]?limit(?:ed|s)?|too many requests|429|quota)(?![a-z0-9])", re.I
+)
+
+
+def _is_rate_limit(error: Any) -> bool:
+    """Whether an exception or error message is the API rate limit"""
+    return isinstance(error, RateLimitError) or bool(_RATE_LIMIT_RE.search(str(error)))
+
+
+# =============================================================================
+# CLASSIFICATION CACHE
+# =============================================================================
+
+class ClassificationCache(DiskCache):
+    """
+    On-disk cache of successful classifications keyed by a hash of the request.
+    Repeat tickets and canned calls produce identical prompts; a hit skips the
+    API call entirely. Entries live at <cache_dir>/<hash[:2]>/<hash>.json.
+    """
+    
+    def __init__(self, cache_dir: str = CLASSIFICATION_CACHE_DIR):
+        super().__init__(cache_dir, suffix=".json")
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        data = super().get(key)
+        if data is None:
+            return None
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return None
+    
+    def put(self, key: str, result: Dict[str, Any]):
+        super().put(key, orjson.dumps(result))
+
+
 # =============================================================================
 # NVIDIA NIM CLIENT CLASS
 # =============================================================================
@@ -97,21 +319,206 @@ class NvidiaClassifier:
     Optimized for Hinglish (Hindi-English) transcripts
     """
     
-    def __init__(self, api_key: str = None, base_url: str = None):
-        """Initialize the NVIDIA NIM client"""
+    def __init__(self, api_key: str = None, base_url: str = None,
+                 cache_dir: Optional[str] = CLASSIFICATION_CACHE_DIR):
+        """Initialize the NVIDIA NIM client (cache_dir=None disables the result cache)"""
         self.api_key = api_key or NVIDIA_API_KEY
         self.base_url = base_url or NVIDIA_BASE_URL
         
-        self.client = OpenAI(
-            base_url=self.base_url,
-            api_key=self.api_key
-        )
         self.model = NVIDIA_MODEL
+        # Flipped off if the endpoint rejects response_format
+        self.structured_output = True
+        
+        # Async path: per-loop client bounded to CLASSIFY_CONCURRENCY in-flight
+        # requests, paced by a token bucket instead of a fixed sleep per call
+        self.async_clients = AsyncClientCache(self.api_key, CLASSIFY_CONCURRENCY, base_url=self.base_url)
+        self.rate_limiter = AsyncRateLimiter(CLASSIFY_REQUESTS_PER_MINUTE, 60)
+        
+        self.cache = ClassificationCache(cache_dir) if cache_dir else None
+    
+    @property
+    def client(self) -> OpenAI:
+        """
+        Shared HTTP/2 connection pool, so classifier instances and the
+        classify_batch threads reuse connections instead of re-handshaking.
+        Looked up on every access, so a forked child gets its own pool.
+        """
+        return get_shared_client(self.api_key, self.base_url)
+    
+    def cache_key(self, prompt: str) -> str:
+        """Cache key of a filled prompt under the current model settings"""
+        return ClassificationCache.key(self.model, MODEL_TEMPERATURE, MODEL_TOP_P, MODEL_MAX_TOKENS, prompt)
+    
+    def _cached_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Previously stored classification for key, marked as coming from the cache"""
+        if self.cache is None:
+            return None
+        result = self.cache.get(key)
+        if result is not None:
+            result['from_cache'] = True
+        return result
+    
+    def _store_result(self, key: str, result: Dict[str, Any]):
+        """Cache successful classifications (failures are retried next time)"""
+        if self.cache is not None and result.get('classification_success'):
+            self.cache.put(key, result)
+    
+    def _build_prompt(self, transcript: str, metadata: Dict[str, Any]) -> str:
+        """Fill the classification prompt for one call"""
+        return _fill_prompt(self._prompt_values(transcript, metadata))
+    
+    def _build_multi_prompt(self, items: List[Tuple[str, Dict[str, Any]]]) -> str:
+        """Prompt classifying several (transcript, metadata) calls in one request"""
+        return MULTI_CLASSIFICATION_PROMPT_HEADER + "\n\n".join(
+            f"=== CALL {n} ===\n" + _fill(_CALL_SEGMENTS, self._prompt_values(transcript, metadata))
+            for n, (transcript, metadata) in enumerate(items, 1)
+        )
+    
+    def _prompt_values(self, transcript: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Placeholder values of the classification prompt for one call"""
+        # Limit to ~1500 chars for 4096 token context limit, and bound the
+        # payload for Devanagari text
+        transcript = _truncate_to_bytes(transcript[:1500], CLASSIFY_TRANSCRIPT_MAX_BYTES)
+        summary = str(metadata.get('summary', 'Not available'))[:800]
+        
+        return {
+            'transcript': transcript,
+            'customer_type': metadata.get('customer_type', 'Unknown'),
+            'city': metadata.get('city', 'Unknown'),
+            'call_direction': metadata.get('call_direction', 'Unknown'),
+            'is_repeat': metadata.get('is_repeat', 'Unknown'),
+            'duration': metadata.get('duration', 'Unknown'),
+            'summary': summary
+        }
+    
+    def _request(self, prompt: str, response_format: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Chat completion arguments for a non-streamed classification"""
+        request = {
+            'model': self.model,
+            'messages': [{"role": "user", "content": prompt}],
+            'temperature': MODEL_TEMPERATURE,
+            'top_p': MODEL_TOP_P,
+            'max_tokens': MODEL_MAX_TOKENS,
+            'stream': False
+        }
+        if response_format and self.structured_output:
+            request['response_format'] = response_format
+        return request
+    
+    def _structured_output_rejected(self, request: Dict[str, Any], error: BadRequestError) -> bool:
+        """True (and structured output switched off) if error is the endpoint rejecting response_format"""
+        if 'response_format' not in request or not self.structured_output:
+            return False
+        if not is_response_format_rejection(error):
+            return False
+        print(f"⚠️ Structured output not supported, falling back to free text: {str(error)}")
+        self.structured_output = False
+        return True
+    
+    @retry(stop=stop_after_attempt(MAX_RETRIES), wait=retry_wait,
+           retry=retry_if_exception_type(TRANSIENT_ERRORS), reraise=True)
+    def _complete(self, prompt: str, response_format: Dict[str, Any] = CLASSIFICATION_RESPONSE_FORMAT) -> str:
+        """
+        Response text for a prompt, decoded against response_format's schema
+        where the endpoint supports it. Transient errors are retried with
+        jittered backoff; instead of sleeping after every call, pauses only
+        when the rate-limit headers say the request budget is nearly spent.
+        """
+        completions = self.client.with_options(max_retries=0).chat.completions
+        request = self._request(prompt, response_format)
+        try:
+            raw = completions.with_raw_response.create(**request)
+        except BadRequestError as e:
+            if not self._structured_output_rejected(request, e):
+                raise
+            raw = completions.with_raw_response.create(**self._request(prompt))
+        delay = rate_limit_delay(raw.headers)
+        if delay:
+            time.sleep(delay)
+        return raw.parse().choices[0].message.content.strip()
+    
+    async def _complete_async(self, prompt: str,
+                              response_format: Dict[str, Any] = CLASSIFICATION_RESPONSE_FORMAT) -> str:
+        """Async version of _complete; a low request budget holds back all requests"""
+        client, semaphore = self.async_clients.get()
+        client = client.with_options(max_retries=0)
+        
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(MAX_RETRIES),
+            wait=retry_wait,
+            retry=retry_if_exception_type(TRANSIENT_ERRORS),
+            reraise=True
+        ):
+            with attempt:
+                async with self.rate_limiter, semaphore:
+                    request = self._request(prompt, response_format)
+                    try:
+                        raw = await client.chat.completions.with_raw_response.create(**request)
+                    except BadRequestError as e:
+                        if not self._structured_output_rejected(request, e):
+                            raise
+                        raw = await client.chat.completions.with_raw_response.create(**self._request(prompt))
+                delay = rate_limit_delay(raw.headers)
+                if delay:
+                    self.rate_limiter.defer(delay)
+                return raw.parse().choices[0].message.content.strip()
+    
+    def _skipped_result(self, transcript: Any, metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Label for calls too short to classify (no API request), else None"""
+        try:
+            too_brief = float(metadata.get('duration')) < CLASSIFY_MIN_DURATION_SECONDS
+        except (TypeError, ValueError):
+            too_brief = False
+        
+        if too_brief or not isinstance(transcript, str) or len(transcript.strip()) < CLASSIFY_MIN_TRANSCRIPT_CHARS:
+            return {
+                'classification_success': True,
+                'skipped': True,
+                'skip_reason': 'too_short',
+                'primary_category': 'MISCELLANEOUS',
+                'issue_summary': 'Call too short to classify'
+            }
+        return None
+    
+    def _load_json(self, response_text: str) -> Dict[str, Any]:
+        """
+        Decode the JSON object in a response, ignoring code fences and
+        surrounding text. Anything but an object raises JSONDecodeError here
+        rather than failing later on a missing field.
+        """
+        try:
+            # Schema-constrained responses are bare JSON; only free-text
+            # fallbacks and streamed replies may come wrapped
+            result = orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            candidate = extract_json_object(response_text)
+            if candidate is None:
+                raise
+            result = orjson.loads(candidate)
         
-    @retry(stop=stop_after_attempt(MAX_RETRIES), wait=wait_exponential(multiplier=1, min=2, max=10))
+        if not isinstance(result, dict):
+            raise orjson.JSONDecodeError("Expected a JSON object", response_text, 0)
+        return result
+    
+    def _conform(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark a decoded classification successful, filling container fields it left out"""
+        for field, default in _CONTAINER_DEFAULTS:
+            if not isinstance(result.get(field), default):
+                result[field] = default()
+        result['classification_success'] = True
+        return result
+    
+    def _parse_response(self, response_text: str) -> Dict[str, Any]:
+        """Classification in a single-call response"""
+        return self._conform(self._load_json(response_text))
+        
+    @retry(stop=stop_after_attempt(MAX_RETRIES), wait=wait_exponential(multiplier=1, min=RETRY_DELAY, max=10))
     def classify_single(self, transcript: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Classify a single transcript
+        Classify a single transcript, streaming the response
+        
+        Meant for interactive use; batch paths call
+        classify_single_non_streaming, which skips per-chunk overhead.
         
         Args:
             transcript: The call transcript text
@@ -120,15 +527,11 @@ class NvidiaClassifier:
         Returns:
             Dictionary with classification results
         """
-        prompt = CLASSIFICATION_PROMPT.format(
-            transcript=transcript[:1500],  # Limit to ~1500 chars for 4096 token context limit
-            customer_type=metadata.get('customer_type', 'Unknown'),
-            city=metadata.get('city', 'Unknown'),
-            call_direction=metadata.get('call_direction', 'Unknown'),
-            is_repeat=metadata.get('is_repeat', 'Unknown'),
-            duration=metadata.get('duration', 'Unknown'),
-            summary=metadata.get('summary', 'Not available')[:800]
-        )
+        skipped = self._skipped_result(transcript, metadata)
+        if skipped is not None:
+            return skipped
+        
+        prompt = self._build_prompt(transcript, metadata)
         
         try:
             # Use streaming for better handling
@@ -143,31 +546,18 @@ class NvidiaClassifier:
                 stream=True
             )
             
+            # Collect the deltas and join once; += would copy the growing
+            # response on every chunk
+            parts = []
             for chunk in completion:
-                if chunk.choices[0].delta.content is not None:
-                    response_text += chunk.choices[0].delta.content
+                content = chunk.choices[0].delta.content
+                if content is not None:
+                    parts.append(content)
+            response_text = "".join(parts)
             
-            # Clean response - handle potential markdown code blocks
-            response_text = response_text.strip()
-            if response_text.startswith("```"):
-                # Extract content between code blocks
-                lines = response_text.split("\n")
-                start_idx = 1 if lines[0].startswith("```") else 0
-                end_idx = len(lines)
-                for i, line in enumerate(lines):
-                    if i > 0 and line.strip() == "```":
-                        end_idx = i
-                        break
-                response_text = "\n".join(lines[start_idx:end_idx])
-                if response_text.startswith("json"):
-                    response_text = response_text[4:].strip()
-            
-            # Parse JSON
-            result = json.loads(response_text)
-            result['classification_success'] = True
-            return result
+            return self._parse_response(response_text)
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             return {
                 'classification_success': False,
                 'error': f'JSON parse error: {str(e)}',
@@ -192,46 +582,66 @@ class NvidiaClassifier:
         Returns:
             Dictionary with classification results
         """
-        prompt = CLASSIFICATION_PROMPT.format(
-            transcript=transcript[:1500],
-            customer_type=metadata.get('customer_type', 'Unknown'),
-            city=metadata.get('city', 'Unknown'),
-            call_direction=metadata.get('call_direction', 'Unknown'),
-            is_repeat=metadata.get('is_repeat', 'Unknown'),
-            duration=metadata.get('duration', 'Unknown'),
-            summary=metadata.get('summary', 'Not available')[:800]
-        )
+        skipped = self._skipped_result(transcript, metadata)
+        if skipped is not None:
+            return skipped
+        
+        return self.classify_prompt(self._build_prompt(transcript, metadata))
+    
+    def classify_prompt(self, prompt: str) -> Dict[str, Any]:
+        """Classify an already filled prompt (see _build_prompt)"""
+        key = self.cache_key(prompt)
+        
+        cached = self._cached_result(key)
+        if cached is not None:
+            return cached
         
         try:
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=MODEL_TEMPERATURE,
-                top_p=MODEL_TOP_P,
-                max_tokens=MODEL_MAX_TOKENS,
-                stream=False
-            )
-            
-            response_text = completion.choices[0].message.content.strip()
-            
-            # Clean response
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                start_idx = 1
-                end_idx = len(lines)
-                for i, line in enumerate(lines):
-                    if i > 0 and line.strip() == "```":
-                        end_idx = i
-                        break
-                response_text = "\n".join(lines[start_idx:end_idx])
-                if response_text.startswith("json"):
-                    response_text = response_text[4:].strip()
+            response_text = self._complete(prompt)
+            result = self._parse_response(response_text)
+            self._store_result(key, result)
+            return result
             
-            result = json.loads(response_text)
-            result['classification_success'] = True
+        except orjson.JSONDecodeError as e:
+            return {
+                'classification_success': False,
+                'error': f'JSON parse error: {str(e)}',
+                'primary_category': 'MISCELLANEOUS',
+                'raw_response': response_text[:500] if 'response_text' in locals() else 'No response'
+            }
+        except Exception as e:
+            return {
+                'classification_success': False,
+                'error': str(e),
+                'primary_category': 'MISCELLANEOUS'
+            }
+    
+    async def classify_single_async(self, transcript: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of classify_single_non_streaming, for classifying many
+        calls concurrently from one event loop
+        """
+        skipped = self._skipped_result(transcript, metadata)
+        if skipped is not None:
+            return skipped
+        
+        return await self.classify_prompt_async(self._build_prompt(transcript, metadata))
+    
+    async def classify_prompt_async(self, prompt: str) -> Dict[str, Any]:
+        """Classify an already filled prompt (see _build_prompt)"""
+        key = self.cache_key(prompt)
+        
+        cached = self._cached_result(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            response_text = await self._complete_async(prompt)
+            result = self._parse_response(response_text)
+            self._store_result(key, result)
             return result
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             return {
                 'classification_success': False,
                 'error': f'JSON parse error: {str(e)}',
@@ -245,12 +655,82 @@ class NvidiaClassifier:
                 'primary_category': 'MISCELLANEOUS'
             }
     
+    def _multi_results(self, response_text: str, count: int) -> List[Dict[str, Any]]:
+        """Split a multi-call response into per-call results (failed for calls it leaves out)"""
+        results: List[Optional[Dict[str, Any]]] = [None] * count
+        
+        for item in self._load_json(response_text).get('results', []):
+            n = item.get('call') if isinstance(item, dict) else None
+            if isinstance(n, int) and 1 <= n <= count and results[n - 1] is None:
+                result = self._conform({k: v for k, v in item.items() if k != 'call'})
+                result['batched'] = True
+                results[n - 1] = result
+        
+        return [
+            result or {'classification_success': False, 'error': 'Missing from batch response', 'primary_category': 'MISCELLANEOUS'}
+            for result in results
+        ]
+    
+    def classify_multi(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Classify several short calls with a single request
+        
+        Saves per-request overhead for short transcripts; keep to at most
+        CLASSIFY_MULTI_SIZE calls of up to CLASSIFY_MULTI_MAX_CHARS each so
+        the request fits the model's context.
+        
+        Args:
+            items: (transcript, metadata) pairs
+            
+        Returns:
+            One result per item, in the same order
+        """
+        results = [self._skipped_result(transcript, metadata) for transcript, metadata in items]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        try:
+            response_text = self._complete(
+                self._build_multi_prompt([items[i] for i in pending]), MULTI_CLASSIFICATION_RESPONSE_FORMAT
+            )
+            classified = self._multi_results(response_text, len(pending))
+        except Exception as e:
+            classified = [{'classification_success': False, 'error': str(e), 'primary_category': 'MISCELLANEOUS'}] * len(pending)
+        
+        for i, result in zip(pending, classified):
+            results[i] = dict(result)
+        return results
+    
+    async def classify_multi_async(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Async version of classify_multi"""
+        results = [self._skipped_result(transcript, metadata) for transcript, metadata in items]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        try:
+            response_text = await self._complete_async(
+                self._build_multi_prompt([items[i] for i in pending]), MULTI_CLASSIFICATION_RESPONSE_FORMAT
+            )
+            classified = self._multi_results(response_text, len(pending))
+        except Exception as e:
+            classified = [{'classification_success': False, 'error': str(e), 'primary_category': 'MISCELLANEOUS'}] * len(pending)
+        
+        for i, result in zip(pending, classified):
+            results[i] = dict(result)
+        return results
+    
     def classify_batch(self, df: pd.DataFrame, 
                        transcript_col: str = 'transcript',
                        progress_callback=None) -> pd.DataFrame:
         """
         Classify all transcripts in a DataFrame
         
+        Requests run on a thread pool of CLASSIFY_CONCURRENCY workers (they
+        spend nearly all their time waiting on the network); rows with the
+        same prompt share one request. Results keep the DataFrame's row order.
+        
         Args:
             df: DataFrame with transcripts
             transcript_col: Name of transcript column
@@ -259,84 +739,190 @@ class NvidiaClassifier:
         Returns:
             DataFrame with added classification columns
         """
-        results = []
+        if df.empty:
+            return df
         
-        for idx, row in tqdm(df.iterrows(), total=len(df), desc="Classifying transcripts"):
+        results = [None] * len(df)
+        columns = _columns(df, {
+            'customer_type': '', 'city_name': '', 'FLAG_IN_OUT': '',
+            'is_ticket_repeat60d': '', 'call_duration': '', 'summary': ''
+        })
+        transcripts = df[transcript_col].tolist()
+        index = df.index.tolist()
+        
+        # Row positions per distinct prompt, so duplicates cost one request
+        prompts = {}
+        rows_by_key = {}
+        for i in range(len(df)):
             metadata = {
-                'customer_type': row.get('customer_type', ''),
-                'city': row.get('city_name', ''),
-                'call_direction': row.get('FLAG_IN_OUT', ''),
-                'is_repeat': row.get('is_ticket_repeat60d', ''),
-                'duration': row.get('call_duration', ''),
-                'summary': row.get('summary', '')
+                'customer_type': columns['customer_type'][i],
+                'city': columns['city_name'][i],
+                'call_direction': columns['FLAG_IN_OUT'][i],
+                'is_repeat': columns['is_ticket_repeat60d'][i],
+                'duration': columns['call_duration'][i],
+                'summary': columns['summary'][i]
             }
+            skipped = self._skipped_result(transcripts[i], metadata)
+            if skipped is not None:
+                results[i] = dict(skipped, original_index=index[i])
+                continue
             
-            result = self.classify_single(row[transcript_col], metadata)
-            result['original_index'] = idx
-            results.append(result)
-            
-            # Small delay to avoid rate limiting
-            time.sleep(0.3)
-            
-            if progress_callback:
-                progress_callback(idx + 1, len(df))
+            prompt = self._build_prompt(transcripts[i], metadata)
+            key = self.cache_key(prompt)
+            prompts.setdefault(key, prompt)
+            rows_by_key.setdefault(key, []).append(i)
         
-        # Convert results to DataFrame
-        results_df = pd.DataFrame(results)
+        completed = len(df) - sum(len(rows) for rows in rows_by_key.values())
+        
+        with ThreadPoolExecutor(max_workers=CLASSIFY_CONCURRENCY) as pool:
+            futures = {pool.submit(self.classify_prompt, prompt): key for key, prompt in prompts.items()}
+            
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Classifying transcripts"):
+                result = future.result()
+                for i in rows_by_key[futures[future]]:
+                    results[i] = dict(result, original_index=index[i])
+                completed += len(rows_by_key[futures[future]])
+                
+                if progress_callback:
+                    progress_callback(completed, len(df))
         
-        # Merge with original DataFrame
-        df_with_results = df.copy()
-        for col in results_df.columns:
-            if col != 'original_index':
-                df_with_results[f'ai_{col}'] = results_df[col].values
+        # Convert results to DataFrame, aligned with the input rows
+        results_df = pd.DataFrame(results, index=df.index).drop(columns='original_index').add_prefix('ai_')
+        results_df = _with_categories(results_df, 'ai_')
         
-        return df_with_results
+        # Merge with original DataFrame in one concat rather than copying it
+        # and inserting a column at a time; re-run ai_ columns are replaced
+        overlap = df.columns.intersection(results_df.columns)
+        if len(overlap):
+            df = df.drop(columns=overlap)
+        return pd.concat([df, results_df], axis=1)
 
 
 # =============================================================================
 # BATCH PROCESSING WITH CHECKPOINTING
 # =============================================================================
 
+def _row_key(call_id: Any, transcript: Any) -> str:
+    """Identity of an input row, stored with its checkpointed result"""
+    return DiskCache.key(call_id, transcript)
+
+
 class BatchProcessor:
     """
     Handles batch processing with checkpointing for large datasets
     """
     
-    def __init__(self, classifier: NvidiaClassifier, checkpoint_dir: str = "checkpoints"):
+    def __init__(self, classifier: NvidiaClassifier, checkpoint_dir: str = "checkpoints",
+                 verbose: bool = False):
+        """
+        Args:
+            classifier: Classifier used for each record
+            checkpoint_dir: Where batch checkpoints are written
+            verbose: Print a status line per record (batch summaries are
+                always printed)
+        """
         self.classifier = classifier
         self.checkpoint_dir = checkpoint_dir
+        self.verbose = verbose
         os.makedirs(checkpoint_dir, exist_ok=True)
     
+    # Each result is appended to batch_<id>.jsonl as soon as it arrives, so a
+    # crash loses no completed API calls. Resuming matches successful results
+    # to rows by original_index across all checkpoint files, so it does not
+    # depend on the batch size used before; failed rows are requested again.
+    # A result is only reused if its row_key (call id + transcript) matches
+    # the row's, so another dataset's labels are never picked up.
+    
     def get_checkpoint_path(self, batch_id: int) -> str:
+        return os.path.join(self.checkpoint_dir, f"batch_{batch_id}.jsonl")
+    
+    def _legacy_checkpoint_path(self, batch_id: int) -> str:
+        """Whole-batch JSON checkpoint written by earlier versions"""
         return os.path.join(self.checkpoint_dir, f"batch_{batch_id}.json")
     
-    def load_checkpoint(self, batch_id: int) -> Optional[List[Dict]]:
-        path = self.get_checkpoint_path(batch_id)
-        if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return None
+    def _read_checkpoint(self, path: str) -> List[Dict]:
+        """Results in a checkpoint file (JSONL, or a legacy whole-batch JSON list)"""
+        with open(path, 'rb') as f:
+            if path.endswith('.json'):
+                return orjson.loads(f.read())
+            
+            results = []
+            for line in f:
+                try:
+                    results.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    # Last line cut short by a crash; that record is redone
+                    pass
+            return results
     
-    def save_checkpoint(self, batch_id: int, results: List[Dict]):
+    def load_completed(self) -> Dict[Any, Dict]:
+        """Every successful checkpointed result in checkpoint_dir, by original_index"""
+        completed = {}
+        with os.scandir(self.checkpoint_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('batch_') and entry.name.endswith(('.jsonl', '.json')):
+                    for result in self._read_checkpoint(entry.path):
+                        # Failures are left out, so a resume retries them
+                        if result.get('classification_success'):
+                            completed[result.get('original_index')] = result
+        return completed
+    
+    def open_checkpoint(self, batch_id: int):
+        """Open a batch checkpoint for appending, past any line cut short by a crash"""
         path = self.get_checkpoint_path(batch_id)
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        checkpoint_file = open(path, 'ab')
+        if checkpoint_file.tell():
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    checkpoint_file.write(b"\n")
+        return checkpoint_file
+    
+    def append_checkpoint(self, checkpoint_file, result: Dict):
+        """Write one result to an open batch checkpoint file"""
+        checkpoint_file.write(orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+        checkpoint_file.flush()
+    
+    def clear_checkpoints(self):
+        """Remove every batch checkpoint in checkpoint_dir, whatever run or batch size wrote it"""
+        with os.scandir(self.checkpoint_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('batch_') and entry.name.endswith(('.jsonl', '.json', '.done')):
+                    os.remove(entry.path)
     
     def process_with_checkpoints(self, df: pd.DataFrame, 
                                   batch_size: int = BATCH_SIZE,
-                                  resume: bool = True) -> pd.DataFrame:
+                                  resume: bool = True,
+                                  items_per_request: int = 1) -> pd.DataFrame:
         """
         Process DataFrame in batches with checkpointing
-        Shows detailed status for each record
+        Prints a summary per batch, plus a status line per record if verbose
         
         Args:
             df: Input DataFrame
             batch_size: Number of records per batch
-            resume: Whether to resume from checkpoints
+            resume: Whether to resume from checkpoints (False deletes every
+                batch checkpoint in checkpoint_dir first)
+            items_per_request: Short calls classified per request
+                (capped at CLASSIFY_MULTI_SIZE; 1 sends one call per request)
             
         Returns:
             DataFrame with all classifications
         """
+        return run_sync(self.process_with_checkpoints_async(df, batch_size, resume, items_per_request))
+    
+    async def process_with_checkpoints_async(self, df: pd.DataFrame,
+                                             batch_size: int = BATCH_SIZE,
+                                             resume: bool = True,
+                                             items_per_request: int = 1) -> pd.DataFrame:
+        """
+        Async version of process_with_checkpoints
+        
+        Records within a batch are classified concurrently (bounded by
+        CLASSIFY_CONCURRENCY and paced by CLASSIFY_REQUESTS_PER_MINUTE);
+        each result is checkpointed as soon as it arrives.
+        """
+        items_per_request = max(1, min(items_per_request, CLASSIFY_MULTI_SIZE))
         all_results = []
         total_batches = (len(df) + batch_size - 1) // batch_size
         total_records = len(df)
@@ -357,29 +943,50 @@ class BatchProcessor:
         print(f"📦 Batch Size: {batch_size}")
         print(f"📁 Total Batches: {total_batches}")
         print(f"🤖 Model: {NVIDIA_MODEL}")
+        print(f"⚡ Concurrency: {CLASSIFY_CONCURRENCY} requests | {CLASSIFY_REQUESTS_PER_MINUTE}/min")
         print(f"💾 Checkpoint Directory: {self.checkpoint_dir}")
         print("=" * 80 + "\n")
         
         start_time = time.time()
         
+        columns = _columns(df, {
+            'transcript': '', 'click_to_call_id': 'N/A', 'city_name': 'N/A', 'customer_type': 'N/A',
+            'call_duration': '', 'FLAG_IN_OUT': '', 'is_ticket_repeat60d': '', 'summary': ''
+        })
+        columns['row_key'] = [
+            _row_key(call_id, transcript)
+            for call_id, transcript in zip(columns['click_to_call_id'], columns['transcript'])
+        ]
+        index = df.index.tolist()
+        
+        # Rows already classified by an earlier run, whatever batch they were in
+        if resume:
+            done = self.load_completed()
+        else:
+            self.clear_checkpoints()
+            done = {}
+        if done:
+            print(f"📂 Found {len(done):,} checkpointed records\n")
+        
         for batch_id in range(total_batches):
             start_idx = batch_id * batch_size
             end_idx = min(start_idx + batch_size, len(df))
             batch_start_time = time.time()
             
             # Check for existing checkpoint
+            completed = {}
             if resume:
-                checkpoint = self.load_checkpoint(batch_id)
-                if checkpoint:
-                    stats['from_checkpoint'] += len(checkpoint)
-                    stats['processed'] += len(checkpoint)
-                    for r in checkpoint:
-                        if r.get('classification_success'):
-                            stats['success'] += 1
-                        else:
-                            stats['failed'] += 1
-                    all_results.extend(checkpoint)
-                    print(f"📂 Batch {batch_id + 1}/{total_batches}: Loaded {len(checkpoint)} records from checkpoint")
+                completed = {
+                    index[pos]: done[index[pos]] for pos in range(start_idx, end_idx)
+                    if done.get(index[pos], {}).get('row_key') == columns['row_key'][pos]
+                }
+                stats['from_checkpoint'] += len(completed)
+                stats['processed'] += len(completed)
+                stats['success'] += len(completed)
+                
+                if len(completed) == end_idx - start_idx:
+                    all_results.extend(completed[idx] for idx in index[start_idx:end_idx])
+                    print(f"📂 Batch {batch_id + 1}/{total_batches}: Loaded {len(completed)} records from checkpoint")
                     continue
             
             # Process batch
@@ -387,77 +994,15 @@ class BatchProcessor:
             print(f"📦 BATCH {batch_id + 1}/{total_batches} | Records {start_idx + 1} to {end_idx}")
             print(f"{'─' * 80}")
             
-            batch_df = df.iloc[start_idx:end_idx]
-            batch_results = []
+            # Records already checkpointed are not requested again
+            if completed:
+                print(f"   📂 Resuming: {len(completed)} records already in checkpoint")
             
-            for i, (idx, row) in enumerate(batch_df.iterrows()):
-                record_num = start_idx + i + 1
-                call_id = row.get('click_to_call_id', 'N/A')
-                city = row.get('city_name', 'N/A')
-                ctype = row.get('customer_type', 'N/A')
-                duration = row.get('call_duration', 0)
-                
-                # Show record being processed
-                print(f"   [{record_num:5}/{total_records}] ID: {call_id} | {city[:15]:15} | {ctype[:10]:10} | {duration:4}s ", end="", flush=True)
-                
-                metadata = {
-                    'customer_type': ctype,
-                    'city': city,
-                    'call_direction': row.get('FLAG_IN_OUT', ''),
-                    'is_repeat': row.get('is_ticket_repeat60d', ''),
-                    'duration': duration,
-                    'summary': row.get('summary', '')
-                }
-                
-                try:
-                    result = self.classifier.classify_single(row['transcript'], metadata)
-                    result['original_index'] = idx
-                    result['call_id'] = call_id
-                    batch_results.append(result)
-                    
-                    stats['processed'] += 1
-                    
-                    if result.get('classification_success'):
-                        stats['success'] += 1
-                        category = result.get('primary_category', 'N/A')
-                        sentiment = result.get('sentiment', 'N/A')
-                        churn = result.get('churn_risk', 'N/A')
-                        print(f"✅ {category[:20]:20} | {sentiment[:10]:10} | Churn: {churn}")
-                    else:
-                        stats['failed'] += 1
-                        error = result.get('error', 'Unknown error')[:40]
-                        print(f"⚠️  FAILED: {error}")
-                        
-                        # Check for API limit errors
-                        if 'rate' in error.lower() or 'limit' in error.lower() or '429' in error:
-                            stats['api_errors'] += 1
-                            print(f"   🚨 API RATE LIMIT DETECTED! Waiting 60 seconds...")
-                            time.sleep(60)
-                
-                except Exception as e:
-                    stats['processed'] += 1
-                    stats['failed'] += 1
-                    error_msg = str(e)[:50]
-                    print(f"❌ ERROR: {error_msg}")
-                    
-                    # Check for API errors
-                    if 'rate' in error_msg.lower() or 'limit' in error_msg.lower() or '429' in str(e):
-                        stats['api_errors'] += 1
-                        print(f"   🚨 API RATE LIMIT! Pausing for 60 seconds...")
-                        time.sleep(60)
-                    
-                    batch_results.append({
-                        'original_index': idx,
-                        'call_id': call_id,
-                        'classification_success': False,
-                        'error': str(e),
-                        'primary_category': 'MISCELLANEOUS'
-                    })
-                
-                time.sleep(0.3)  # Rate limiting between records
+            batch_results = await self._process_batch_async(
+                columns, index, start_idx, end_idx, total_records, stats, batch_id, completed,
+                items_per_request
+            )
             
-            # Save checkpoint
-            self.save_checkpoint(batch_id, batch_results)
             all_results.extend(batch_results)
             
             # Batch summary
@@ -487,19 +1032,145 @@ class BatchProcessor:
         print("=" * 80 + "\n")
         
         # Convert to DataFrame
-        results_df = pd.DataFrame(all_results)
-        return results_df
+        return _with_categories(pd.DataFrame(all_results))
+    
+    async def _classify_record_async(self, position: int, idx, call_id, row_key: str,
+                                     classification: asyncio.Future) -> Tuple[int, Dict[str, Any]]:
+        """
+        Wait for a record's classification (possibly shared with identical
+        records), turning any exception into a failed result
+        """
+        try:
+            result = dict(await classification)
+        except Exception as e:
+            result = {
+                'classification_success': False,
+                'error': str(e),
+                'primary_category': 'MISCELLANEOUS'
+            }
+        result['original_index'] = idx
+        result['call_id'] = call_id
+        result['row_key'] = row_key
+        return position, result
+    
+    async def _process_batch_async(self, columns: Dict[str, List[Any]], index: List[Any],
+                                   start_idx: int, end_idx: int,
+                                   total_records: int, stats: Dict[str, int],
+                                   batch_id: int, completed: Dict[Any, Dict],
+                                   items_per_request: int = 1) -> List[Dict]:
+        """
+        Classify records start_idx..end_idx concurrently
+        
+        Records found in `completed` (by original index) are reused as is.
+        With items_per_request > 1, short calls are grouped into shared
+        requests (classify_multi_async).
+        Each new result is appended to the batch checkpoint (and its status
+        line printed, if verbose) as soon as it completes; the returned
+        results keep the batch's row order.
+        """
+        prefixes = [None] * (end_idx - start_idx)
+        batch_results = [completed.get(index[pos]) for pos in range(start_idx, end_idx)]
+        tasks = []
+        # Records with identical prompts share one request
+        classifications = {}
+        # Short records waiting to be grouped: (i, call_id, transcript, metadata)
+        groupable = []
+        
+        for i, pos in enumerate(range(start_idx, end_idx)):
+            if batch_results[i] is not None:
+                continue
+            
+            call_id = columns['click_to_call_id'][pos]
+            city = str(columns['city_name'][pos])
+            ctype = str(columns['customer_type'][pos])
+            duration = columns['call_duration'][pos]
+            
+            metadata = {
+                'customer_type': ctype,
+                'city': city,
+                'call_direction': columns['FLAG_IN_OUT'][pos],
+                'is_repeat': columns['is_ticket_repeat60d'][pos],
+                'duration': duration,
+                'summary': columns['summary'][pos]
+            }
+            
+            if self.verbose:
+                prefixes[i] = f"   [{pos + 1:5}/{total_records}] ID: {call_id} | {city[:15]:15} | {ctype[:10]:10} | {duration:4}s "
+            transcript = columns['transcript'][pos]
+            skipped = self.classifier._skipped_result(transcript, metadata)
+            if skipped is not None:
+                classification = asyncio.get_running_loop().create_future()
+                classification.set_result(skipped)
+            elif items_per_request > 1 and len(transcript) <= CLASSIFY_MULTI_MAX_CHARS:
+                groupable.append((i, call_id, transcript, metadata))
+                continue
+            else:
+                prompt = self.classifier._build_prompt(transcript, metadata)
+                key = self.classifier.cache_key(prompt)
+                if key not in classifications:
+                    classifications[key] = asyncio.ensure_future(self.classifier.classify_prompt_async(prompt))
+                classification = classifications[key]
+            
+            tasks.append(self._classify_record_async(
+                i, index[pos], call_id, columns['row_key'][pos], classification
+            ))
+        
+        for start in range(0, len(groupable), items_per_request):
+            group = groupable[start:start + items_per_request]
+            request = asyncio.ensure_future(self.classifier.classify_multi_async(
+                [(transcript, metadata) for _, _, transcript, metadata in group]
+            ))
+            for n, (i, call_id, _, _) in enumerate(group):
+                tasks.append(self._classify_record_async(
+                    i, index[start_idx + i], call_id, columns['row_key'][start_idx + i],
+                    _group_member(request, n)
+                ))
+        
+        paused = False
+        
+        with self.open_checkpoint(batch_id) as checkpoint_file:
+            for done in asyncio.as_completed(tasks):
+                i, result = await done
+                batch_results[i] = result
+                self.append_checkpoint(checkpoint_file, result)
+                stats['processed'] += 1
+                
+                if result.get('classification_success'):
+                    stats['success'] += 1
+                    if self.verbose:
+                        category = result.get('primary_category', 'N/A')
+                        sentiment = result.get('sentiment', 'N/A')
+                        churn = result.get('churn_risk', 'N/A')
+                        # One full line per record, so concurrent completions don't interleave
+                        print(f"{prefixes[i]}✅ {category[:20]:20} | {sentiment[:10]:10} | Churn: {churn}")
+                else:
+                    stats['failed'] += 1
+                    error = result.get('error', 'Unknown error')[:40]
+                    if self.verbose:
+                        print(f"{prefixes[i]}⚠️  FAILED: {error}")
+                    
+                    # Out of retries on the rate limit: hold back every request
+                    # still waiting (this batch and the next) instead of
+                    # letting them pile onto the limit as well
+                    if _is_rate_limit(result.get('error', '')):
+                        stats['api_errors'] += 1
+                        self.classifier.rate_limiter.defer(CLASSIFY_RATE_LIMIT_PAUSE)
+                        if not paused:
+                            print(f"   🚨 API RATE LIMIT DETECTED! Pausing requests for {CLASSIFY_RATE_LIMIT_PAUSE} seconds...")
+                            paused = True
+        
+        return batch_results
 
 
 # =============================================================================
 # QUICK SAMPLE CLASSIFIER (for testing)
 # =============================================================================
 
-def classify_sample(df: pd.DataFrame, sample_size: int = 5, api_key: str = None, verbose: bool = True) -> pd.DataFrame:
+def classify_sample(df: pd.DataFrame, sample_size: int = 5, api_key: str = None, verbose: bool = False) -> pd.DataFrame:
     """
     Quick test classification on a sample of transcripts
     Returns a merged DataFrame with all original columns + LLM metrics
-    Shows detailed status for each record
+    Shows a status line per record if verbose
     
     Args:
         df: Full DataFrame
@@ -525,26 +1196,31 @@ def classify_sample(df: pd.DataFrame, sample_size: int = 5, api_key: str = None,
     results = []
     start_time = time.time()
     
-    for idx, row in sample_df.iterrows():
-        call_id = row.get('click_to_call_id', 'N/A')
-        city = str(row.get('city_name', 'N/A'))[:15]
-        ctype = str(row.get('customer_type', 'N/A'))[:10]
-        duration = row.get('call_duration', 0)
-        
-        if verbose:
-            print(f"   [{idx + 1:4}/{total}] ID: {call_id} | {city:15} | {ctype:10} | {duration:4}s ", end="", flush=True)
-        
+    columns = _columns(sample_df, {
+        'click_to_call_id': 'N/A', 'city_name': '', 'customer_type': '', 'call_duration': '',
+        'FLAG_IN_OUT': '', 'is_ticket_repeat60d': '', 'summary': ''
+    })
+    transcripts = sample_df['transcript'].tolist()
+    
+    for idx in range(total):
+        duration = columns['call_duration'][idx]
         metadata = {
-            'customer_type': row.get('customer_type', ''),
-            'city': row.get('city_name', ''),
-            'call_direction': row.get('FLAG_IN_OUT', ''),
-            'is_repeat': row.get('is_ticket_repeat60d', ''),
+            'customer_type': columns['customer_type'][idx],
+            'city': columns['city_name'][idx],
+            'call_direction': columns['FLAG_IN_OUT'][idx],
+            'is_repeat': columns['is_ticket_repeat60d'][idx],
             'duration': duration,
-            'summary': row.get('summary', '')
+            'summary': columns['summary'][idx]
         }
         
+        if verbose:
+            call_id = columns['click_to_call_id'][idx]
+            city = str(metadata['city'])[:15]
+            ctype = str(metadata['customer_type'])[:10]
+            prefix = f"   [{idx + 1:4}/{total}] ID: {call_id} | {city:15} | {ctype:10} | {duration:4}s "
+        
         try:
-            result = classifier.classify_single(row['transcript'], metadata)
+            result = classifier.classify_single_non_streaming(transcripts[idx], metadata)
             results.append(result)
             
             if result.get('classification_success'):
@@ -553,39 +1229,37 @@ def classify_sample(df: pd.DataFrame, sample_size: int = 5, api_key: str = None,
                     category = result.get('primary_category', 'N/A')[:20]
                     sentiment = result.get('sentiment', 'N/A')[:10]
                     churn = result.get('churn_risk', 'N/A')
-                    print(f"✅ {category:20} | {sentiment:10} | Churn: {churn}")
+                    print(f"{prefix}✅ {category:20} | {sentiment:10} | Churn: {churn}")
             else:
                 stats['failed'] += 1
                 error = result.get('error', 'Unknown')[:40]
                 if verbose:
-                    print(f"⚠️  FAILED: {error}")
+                    print(f"{prefix}⚠️  FAILED: {error}")
                 
                 # Check for API rate limit
-                if 'rate' in error.lower() or 'limit' in error.lower() or '429' in error:
+                if _is_rate_limit(result.get('error', '')):
                     stats['api_errors'] += 1
                     if verbose:
-                        print(f"   🚨 API RATE LIMIT! Waiting 60 seconds...")
-                    time.sleep(60)
+                        print(f"   🚨 API RATE LIMIT! Waiting {CLASSIFY_RATE_LIMIT_PAUSE} seconds...")
+                    time.sleep(CLASSIFY_RATE_LIMIT_PAUSE)
         
         except Exception as e:
             stats['failed'] += 1
             error_msg = str(e)[:50]
             if verbose:
-                print(f"❌ ERROR: {error_msg}")
+                print(f"{prefix}❌ ERROR: {error_msg}")
             
-            if 'rate' in error_msg.lower() or 'limit' in error_msg.lower():
+            if _is_rate_limit(e):
                 stats['api_errors'] += 1
                 if verbose:
-                    print(f"   🚨 API RATE LIMIT! Waiting 60 seconds...")
-                time.sleep(60)
+                    print(f"   🚨 API RATE LIMIT! Waiting {CLASSIFY_RATE_LIMIT_PAUSE} seconds...")
+                time.sleep(CLASSIFY_RATE_LIMIT_PAUSE)
             
             results.append({
                 'classification_success': False,
                 'error': str(e),
                 'primary_category': 'MISCELLANEOUS'
             })
-        
-        time.sleep(0.3)
     
     elapsed = time.time() - start_time
     
@@ -602,38 +1276,50 @@ def classify_sample(df: pd.DataFrame, sample_size: int = 5, api_key: str = None,
     results_df = flatten_classification_results(results_df)
     
     # Add 'ai_' prefix to all classification columns
-    results_df = results_df.add_prefix('ai_')
+    results_df = _with_categories(results_df.add_prefix('ai_'), 'ai_')
     
     # Merge with original sample data
-    merged_df = pd.concat([sample_df.reset_index(drop=True), results_df], axis=1)
+    merged_df = pd.concat([sample_df, results_df], axis=1)
     
     return merged_df
 
 
+# executive_performance fields, flattened to exec_<field> columns
+EXECUTIVE_PERFORMANCE_FIELDS = ('empathy_shown', 'solution_offered', 'followed_process', 'escalation_needed')
+
+# List fields, flattened to comma-separated strings
+LIST_RESULT_FIELDS = ('secondary_categories', 'customer_pain_points', 'keywords')
+
+
 def flatten_classification_results(df: pd.DataFrame) -> pd.DataFrame:
     """
     Flatten nested dictionaries and lists in classification results
     """
-    result_df = df.copy()
+    list_cols = [col for col in LIST_RESULT_FIELDS if col in df.columns]
+    nested = ['executive_performance'] if 'executive_performance' in df.columns else []
+    if not list_cols and not nested:
+        return df.copy()
     
-    # Flatten executive_performance dict
-    if 'executive_performance' in result_df.columns:
-        exec_perf = result_df['executive_performance'].apply(
-            lambda x: x if isinstance(x, dict) else {}
-        )
-        result_df['exec_empathy_shown'] = exec_perf.apply(lambda x: x.get('empathy_shown', None))
-        result_df['exec_solution_offered'] = exec_perf.apply(lambda x: x.get('solution_offered', None))
-        result_df['exec_followed_process'] = exec_perf.apply(lambda x: x.get('followed_process', None))
-        result_df['exec_escalation_needed'] = exec_perf.apply(lambda x: x.get('escalation_needed', None))
-        result_df = result_df.drop(columns=['executive_performance'])
-    
-    # Convert lists to comma-separated strings
-    for col in ['secondary_categories', 'customer_pain_points', 'keywords']:
-        if col in result_df.columns:
-            result_df[col] = result_df[col].apply(
-                lambda x: ', '.join(x) if isinstance(x, list) else str(x) if x else ''
-            )
+    # One pass over the nested columns, building every flattened column at once
+    flat = {col: [] for col in list_cols}
+    appends = [flat[col].append for col in list_cols]
+    exec_appends = []
+    if nested:
+        for field in EXECUTIVE_PERFORMANCE_FIELDS:
+            flat[f'exec_{field}'] = column = []
+            exec_appends.append((field, column.append))
+    
+    for values in zip(*(df[col].tolist() for col in list_cols + nested)):
+        for append, x in zip(appends, values):
+            append(', '.join(x) if isinstance(x, list) else str(x) if x else '')
+        if nested:
+            perf = values[-1] if isinstance(values[-1], dict) else {}
+            for field, append in exec_appends:
+                append(perf.get(field))
     
+    result_df = df.drop(columns=nested)
+    for col, values in flat.items():
+        result_df[col] = values
     return result_df
 
 
@@ -3,23 +3,89 @@ Configuration settings for the IndiaMART Insights Engine
 AI-Assisted Sales & Servicing Enhancement System
 """
 
+import os
+
+# Pick up a local .env once per process tree: workers inherit the loaded
+# variables, so they skip the file search
+if not os.environ.get("_DOTENV_LOADED"):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    os.environ["_DOTENV_LOADED"] = "1"
+
 # =============================================================================
 # NVIDIA NIM MODEL CONFIGURATION
 # =============================================================================
 NVIDIA_BASE_URL = "https://integrate.api.nvidia.com/v1"
 NVIDIA_MODEL = "nvidia/nemotron-4-mini-hindi-4b-instruct"
-NVIDIA_API_KEY = "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"
+# Never commit a key: set NVIDIA_API_KEY in the environment or in .env
+NVIDIA_API_KEY = os.environ.get("NVIDIA_API_KEY", "")
 
 # Model parameters
 MODEL_TEMPERATURE = 0.3
 MODEL_TOP_P = 0.9
 MODEL_MAX_TOKENS = 2048  # Reduced to fit within 4096 context limit
 
+# HTTP connection pool (shared by all LLM calls of an agent)
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+
+# NIM speaks HTTP/2: concurrent async calls are multiplexed over one connection
+HTTP2_ENABLED = True
+HTTP_TIMEOUT = 60.0
+HTTP_CONNECT_TIMEOUT = 5.0
+
+# Maximum concurrent in-flight LLM requests for async paths
+LLM_CONCURRENCY = 8
+
+# Identical LLM requests answered from memory, and from INSIGHTS_CACHE_DIR
+# across runs (0 disables the cache)
+LLM_CACHE_SIZE = 1024
+
+# Transcripts with fewer words than this are skipped without an LLM call
+MIN_WORDS_FOR_LLM = 15
+
+# Transcript classification: in-flight requests and requests per minute
+CLASSIFY_CONCURRENCY = 20
+CLASSIFY_REQUESTS_PER_MINUTE = 500
+
+# Transcript payload cap (UTF-8 bytes; Devanagari takes 3 bytes per character)
+CLASSIFY_TRANSCRIPT_MAX_BYTES = 3000
+
+# Calls shorter than this are labelled without an API request
+CLASSIFY_MIN_TRANSCRIPT_CHARS = 20
+CLASSIFY_MIN_DURATION_SECONDS = 3
+
+# Short calls can share one request: up to CLASSIFY_MULTI_SIZE calls whose
+# transcripts are at most CLASSIFY_MULTI_MAX_CHARS each (fits the 4096 token context)
+CLASSIFY_MULTI_SIZE = 3
+CLASSIFY_MULTI_MAX_CHARS = 500
+
+# Pause for all classification requests once one fails on the rate limit
+# after exhausting its retries
+CLASSIFY_RATE_LIMIT_PAUSE = 60
+
 # Batch processing
 BATCH_SIZE = 10
 MAX_RETRIES = 3
 RETRY_DELAY = 2
 
+# =============================================================================
+# SPEECH-TO-TEXT (VOSK)
+# =============================================================================
+
+# Files decoded concurrently by VoskSTT.transcribe_batch (threads sharing one
+# model; Kaldi decoding is CPU-bound, so leave headroom for ffmpeg)
+STT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Chunks whose 16-bit samples all stay below this peak count as silence.
+# Only the first chunk of a silent stretch reaches the recognizer (enough to
+# end the utterance), the rest of e.g. hold music gaps is skipped. Skipping
+# is off when word timestamps are requested, and 0 disables it.
+STT_SILENCE_PEAK = 500
+
 # =============================================================================
 # ISSUE CATEGORIES FOR CLASSIFICATION (IndiaMART Specific)
 # =============================================================================
@@ -43,13 +109,25 @@ ISSUE_CATEGORIES = {
     "MISCELLANEOUS": "Miscellaneous - Other issues"
 }
 
+# Display names: the part of each description before " - "
+ISSUE_CATEGORY_NAMES = {key: description.split(" - ", 1)[0] for key, description in ISSUE_CATEGORIES.items()}
+
 # =============================================================================
 # SELLER UNDERTONES
 # =============================================================================
-SELLER_UNDERTONES = [
+SELLER_UNDERTONES = (
     "ANGRY", "IRRITATED", "DISSATISFIED", "DISENGAGED", "CONFUSED",
     "HESITANT", "NEUTRAL", "INTERESTED", "SATISFIED", "ENTHUSIASTIC"
-]
+)
+
+# =============================================================================
+# LABEL VOCABULARIES (fixed LLM output values, immutable)
+# =============================================================================
+SENTIMENT_LEVELS = ("VERY_NEGATIVE", "NEGATIVE", "NEUTRAL", "POSITIVE", "VERY_POSITIVE")
+CHURN_RISK_LEVELS = ("HIGH", "MEDIUM", "LOW", "NONE")
+RESOLUTION_STATUSES = (
+    "RESOLVED", "PARTIALLY_RESOLVED", "UNRESOLVED", "ESCALATED", "CALLBACK_SCHEDULED"
+)
 
 # =============================================================================
 # PATH CONFIGURATION
@@ -57,5 +135,8 @@ SELLER_UNDERTONES = [
 DATA_DIR = "data"
 OUTPUT_DIR = "output"
 CHECKPOINT_DIR = "checkpoints"
+CLASSIFICATION_CACHE_DIR = "cache/classifications"
+WORKBOOK_CACHE_DIR = "cache/workbooks"
+INSIGHTS_CACHE_DIR = os.path.join(CHECKPOINT_DIR, "insights")
 CLASSIFIED_OUTPUT = "classified_calls.csv"
 INSIGHTS_OUTPUT = "insights_report.json"
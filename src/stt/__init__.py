@@ -1,9 +1,16 @@
 """
 Speech-to-Text (STT) Module
 Vosk-based transcription for Hindi audio
-"""
 
-from .vosk_stt import VoskSTT, STTManager
+The backend is imported on first use, so `import src.stt` does not pull in
+vosk until VoskSTT or STTManager is actually needed.
+"""
 
 __all__ = ['VoskSTT', 'STTManager']
 
+
+def __getattr__(name):
+    if name in __all__:
+        from . import vosk_stt
+        return getattr(vosk_stt, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -10,13 +10,77 @@ Features:
 """
 
 import os
+import re
 import wave
-import json
+import tempfile
+import threading
 import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator
+import numpy as np
+import orjson
 from vosk import Model, KaldiRecognizer
 
+from src.config import STT_WORKERS, STT_SILENCE_PEAK, LLM_CONCURRENCY
+
+# Frames fed to the recognizer per call: 2 s at 16kHz. Offline decoding has
+# no latency budget, so larger chunks just mean fewer Python-level
+# AcceptWaveform calls (and fewer endpoint checks and Result() parses).
+CHUNK_FRAMES = 32000
+
+
+def _is_silent(data: bytes) -> bool:
+    """True if no 16-bit PCM sample in data reaches STT_SILENCE_PEAK"""
+    samples = np.frombuffer(data, dtype=np.int16, count=len(data) // 2)
+    return samples.size == 0 or (samples.max() < STT_SILENCE_PEAK and samples.min() > -STT_SILENCE_PEAK)
+
+
+def _no_log(message: str):
+    pass
+
+
+# "Duration: 00:03:25.51" in ffmpeg's description of its input
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+@lru_cache(maxsize=4096)
+def _read_duration(ffmpeg_path: str, audio_path: str, mtime: float) -> Optional[float]:
+    """
+    Duration of audio_path in seconds from its header, without decoding it
+    (None if unknown). mtime is only part of the cache key, so a file that
+    changes is probed again.
+    """
+    if audio_path.lower().endswith('.wav'):
+        try:
+            with wave.open(audio_path, "rb") as wf:
+                return wf.getnframes() / wf.getframerate()
+        except (OSError, EOFError, wave.Error):
+            return None
+    
+    # Given no output, ffmpeg just describes the input (and exits with an error)
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-hide_banner", "-i", audio_path],
+            capture_output=True, text=True, errors="replace"
+        )
+    except OSError:
+        return None
+    match = _DURATION_RE.search(result.stderr)
+    if match is None:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+# Loaded models by path, shared by every VoskSTT in the process (a model is
+# read-only once loaded and can serve any number of recognizers)
+_models_lock = threading.Lock()
+_models = {}
+
+
 # =============================================================================
 # VOSK STT CLASS
 # =============================================================================
@@ -37,6 +101,7 @@ class VoskSTT:
         self.verbose = verbose
         self.model = None
         self.ffmpeg_path = None
+        self._local = threading.local()
         
         self._init_ffmpeg()
         self._load_model()
@@ -60,35 +125,85 @@ class VoskSTT:
         if not os.path.exists(self.model_path):
             raise FileNotFoundError(f"Vosk model not found at: {self.model_path}")
         
-        self._log(f"⏳ Loading Vosk model: {self.model_path}")
-        self.model = Model(self.model_path)
+        key = os.path.abspath(self.model_path)
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                self._log(f"⏳ Loading Vosk model: {self.model_path}")
+                model = _models[key] = Model(self.model_path)
+        self.model = model
         self._log(f"✅ Vosk model loaded")
     
-    def _convert_to_wav(self, audio_path: str) -> str:
-        """Convert audio to WAV format (16kHz mono)"""
-        audio_path = Path(audio_path)
-        wav_path = audio_path.with_suffix('.wav')
-        
-        if wav_path.exists():
-            return str(wav_path)
-        
-        self._log(f"   Converting to WAV...")
+    def _recognizer(self, sample_rate: int, include_words: bool) -> KaldiRecognizer:
+        """
+        A reset recognizer for sample_rate, reused from file to file.
+        Recognizers are not thread-safe, so each batch worker keeps its own.
+        """
+        recognizers = getattr(self._local, 'recognizers', None)
+        if recognizers is None:
+            recognizers = self._local.recognizers = {}
         
+        rec = recognizers.get(sample_rate)
+        if rec is None:
+            rec = recognizers[sample_rate] = KaldiRecognizer(self.model, sample_rate)
+        else:
+            rec.Reset()
+        rec.SetWords(include_words)
+        return rec
+    
+    def _probe_duration(self, audio_path: str) -> Optional[float]:
+        """Duration in seconds from the file header (memoized; None if unknown)"""
+        try:
+            mtime = os.path.getmtime(audio_path)
+        except OSError:
+            return None
+        return _read_duration(self.ffmpeg_path, str(audio_path), mtime)
+    
+    @staticmethod
+    def _wav_chunks(wf: wave.Wave_read) -> Iterator[bytes]:
+        """PCM of an open WAV file, in CHUNK_FRAMES-frame chunks"""
+        while True:
+            data = wf.readframes(CHUNK_FRAMES)
+            if len(data) == 0:
+                return
+            yield data
+    
+    def _ffmpeg_chunks(self, audio_path: Path) -> Iterator[bytes]:
+        """
+        Decode audio_path to 16kHz mono 16-bit PCM with ffmpeg, streamed over
+        a pipe in CHUNK_FRAMES-sample chunks. Nothing is written to disk,
+        and decoding overlaps with recognition.
+        """
         cmd = [
             self.ffmpeg_path,
-            "-y",
+            "-v", "error",
             "-i", str(audio_path),
             "-ar", "16000",
             "-ac", "1",
-            "-f", "wav",
-            str(wav_path)
+            "-f", "s16le",
+            "-"
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"ffmpeg error: {result.stderr}")
-        
-        return str(wav_path)
+        # stderr goes to a file: an undrained stderr pipe could fill up and stall ffmpeg
+        with tempfile.TemporaryFile() as errors:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors, bufsize=1 << 20)
+            try:
+                while True:
+                    data = proc.stdout.read(CHUNK_FRAMES * 2)
+                    if len(data) == 0:
+                        break
+                    yield data
+                proc.wait()
+            finally:
+                # Abandoned part way (recognition failed or the consumer stopped)
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+            
+            if proc.returncode != 0:
+                errors.seek(0)
+                raise RuntimeError(f"ffmpeg error: {errors.read().decode('utf-8', 'replace')}")
     
     def transcribe(
         self,
@@ -105,53 +220,75 @@ class VoskSTT:
         Returns:
             Dict with transcript, duration, and metadata
         """
+        return self._transcribe(audio_path, include_words, self._log)
+    
+    def _transcribe(self, audio_path: str, include_words: bool, log) -> Dict[str, Any]:
+        """transcribe(), reporting progress through log"""
         audio_path = Path(audio_path)
         if not audio_path.exists():
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
-        self._log(f"\n🎤 Transcribing: {audio_path.name}")
-        
-        # Convert to WAV if needed
-        if audio_path.suffix.lower() != '.wav':
-            wav_path = self._convert_to_wav(str(audio_path))
-        else:
-            wav_path = str(audio_path)
-        
-        # Open WAV file
-        wf = wave.open(wav_path, "rb")
-        duration = wf.getnframes() / wf.getframerate()
-        
-        self._log(f"   Duration: {duration:.1f} seconds")
-        
-        # Create recognizer
-        rec = KaldiRecognizer(self.model, wf.getframerate())
-        rec.SetWords(include_words)
+        log(f"\n🎤 Transcribing: {audio_path.name}")
         
         # Process audio
         transcript_parts = []
         words_list = []
-        
-        while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
-                break
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                transcript_parts.append(result.get("text", ""))
-                if include_words and "result" in result:
-                    words_list.extend(result["result"])
+        total_bytes = 0
+        previous_silent = False
+        
+        # WAV is read directly; anything else is decoded by ffmpeg and streamed
+        # in over a pipe. Opened inside the try, so the input is closed even
+        # if setting up the recognizer fails
+        wf = None
+        chunks = None
+        try:
+            if audio_path.suffix.lower() == '.wav':
+                wf = wave.open(str(audio_path), "rb")
+                sample_rate = wf.getframerate()
+                sample_width = wf.getsampwidth()
+                bytes_per_second = sample_rate * sample_width * wf.getnchannels()
+                chunks = self._wav_chunks(wf)
+            else:
+                sample_rate = 16000
+                sample_width = 2
+                bytes_per_second = 16000 * 2
+                chunks = self._ffmpeg_chunks(audio_path)
+            
+            rec = self._recognizer(sample_rate, include_words)
+            
+            # Skipping silence shifts word timestamps, so only when they aren't wanted
+            skip_silence = STT_SILENCE_PEAK > 0 and sample_width == 2 and not include_words
+            
+            for data in chunks:
+                total_bytes += len(data)
+                if skip_silence:
+                    silent = _is_silent(data)
+                    if silent and previous_silent:
+                        continue
+                    previous_silent = silent
+                if rec.AcceptWaveform(data):
+                    result = orjson.loads(rec.Result())
+                    transcript_parts.append(result.get("text", ""))
+                    if include_words and "result" in result:
+                        words_list.extend(result["result"])
+        finally:
+            if chunks is not None:
+                chunks.close()
+            if wf is not None:
+                wf.close()
         
         # Get final result
-        final_result = json.loads(rec.FinalResult())
+        final_result = orjson.loads(rec.FinalResult())
         transcript_parts.append(final_result.get("text", ""))
         if include_words and "result" in final_result:
             words_list.extend(final_result["result"])
         
-        wf.close()
+        duration = total_bytes / bytes_per_second
+        log(f"   Duration: {duration:.1f} seconds")
         
         transcript = " ".join(transcript_parts).strip()
         
-        self._log(f"   ✅ Transcription complete ({len(transcript)} chars)")
+        log(f"   ✅ Transcription complete ({len(transcript)} chars)")
         
         result = {
             "transcript": transcript,
@@ -165,32 +302,64 @@ class VoskSTT:
         
         return result
     
+    def _transcribe_one(self, audio_path: str) -> Dict[str, Any]:
+        """
+        transcribe() for a batch worker: silent (transcribe_batch reports each
+        file from the calling thread), with failures returned instead of raised
+        """
+        try:
+            result = self._transcribe(audio_path, False, _no_log)
+            result['status'] = 'success'
+        except Exception as e:
+            result = {
+                'file_name': Path(audio_path).name,
+                'status': 'error',
+                'error': str(e)
+            }
+        return result
+    
     def transcribe_batch(
         self,
         audio_paths: List[str],
-        output_dir: str = None
+        output_dir: str = None,
+        max_workers: int = None
     ) -> List[Dict[str, Any]]:
         """
         Transcribe multiple audio files
+        
+        Files are decoded concurrently on a thread pool sharing the one
+        loaded model (each file gets its own recognizer, and Kaldi releases
+        the GIL while decoding), longest first. Results are in the order of
+        audio_paths.
         """
-        results = []
         total = len(audio_paths)
+        max_workers = max_workers or STT_WORKERS
+        results = [None] * total
         
-        self._log(f"\n📦 Batch transcription: {total} files")
+        # Header probes are I/O-bound and cheap: do them all up front, in parallel
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            durations = dict(zip(audio_paths, executor.map(self._probe_duration, audio_paths)))
+        audio_minutes = sum(d for d in durations.values() if d) / 60
         
-        for i, audio_path in enumerate(audio_paths, 1):
-            self._log(f"\n[{i}/{total}]")
-            try:
-                result = self.transcribe(audio_path)
-                result['status'] = 'success'
-            except Exception as e:
-                self._log(f"   ❌ Error: {str(e)}")
-                result = {
-                    'file_name': Path(audio_path).name,
-                    'status': 'error',
-                    'error': str(e)
-                }
-            results.append(result)
+        self._log(f"\n📦 Batch transcription: {total} files, {audio_minutes:.1f} min of audio ({max_workers} workers)")
+        
+        # Longest files first, so the batch doesn't end with one worker still
+        # decoding a long recording while the others sit idle
+        order = sorted(range(total), key=lambda i: durations[audio_paths[i]] or 0, reverse=True)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._transcribe_one, audio_paths[i]): i
+                for i in order
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                result = results[i] = future.result()
+                if result['status'] == 'success':
+                    outcome = f"✅ {result['duration']:.1f}s, {len(result['transcript'])} chars"
+                else:
+                    outcome = f"❌ Error: {result['error']}"
+                self._log(f"[{done}/{total}] {result['file_name']}: {outcome}")
         
         success = sum(1 for r in results if r.get('status') == 'success')
         self._log(f"\n✅ Batch complete: {success}/{total} successful")
@@ -242,6 +411,16 @@ class STTManager:
         self._log("\n📍 Step 1: Speech-to-Text (Vosk)")
         transcript_result = self.stt.transcribe(audio_path)
         
+        self._log("\n📍 Step 2: LLM Analysis (NVIDIA NIM)")
+        return self._analyze(audio_path, transcript_result, metadata)
+    
+    def _analyze(
+        self,
+        audio_path: str,
+        transcript_result: Dict[str, Any],
+        metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Step 2 of process_audio: insights for a finished transcription"""
         if not transcript_result.get('transcript'):
             return {
                 'status': 'error',
@@ -250,8 +429,6 @@ class STTManager:
             }
         
         # Step 2: Analyze with LLM
-        self._log("\n📍 Step 2: LLM Analysis (NVIDIA NIM)")
-        
         metadata['duration'] = transcript_result.get('duration')
         
         insights = self.insights_agent.analyze_transcript(
@@ -268,38 +445,109 @@ class STTManager:
             'metadata': metadata
         }
         
-        self._log(f"\n✅ Complete! Category: {insights.get('primary_category', 'N/A')}")
+        # May run on a folder run's analysis thread: name the file
+        self._log(f"\n✅ Complete! {result['audio_file']} → Category: {insights.get('primary_category', 'N/A')}")
         
         return result
     
+    @staticmethod
+    def _read_results(path: str) -> Dict[str, Dict[str, Any]]:
+        """Successful results in a JSON Lines output file, by audio file name"""
+        results = {}
+        if not os.path.exists(path):
+            return results
+        
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    result = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Last line cut short by a crash; that file is redone
+                    continue
+                if result.get('status') == 'success':
+                    results[result['audio_file']] = result
+        return results
+    
     def process_folder(
         self,
         folder_path: str,
         extensions: List[str] = None,
-        output_file: str = None
+        output_file: str = None,
+        resume: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Process all audio files in a folder
+        
+        With output_file, results are written as JSON Lines (one object per
+        audio file) as each file finishes, so a crash keeps finished files.
+        With resume, files already processed successfully in output_file are
+        not processed again; their stored results are returned instead.
         """
         extensions = extensions or ['.mp3', '.wav', '.m4a', '.ogg']
-        folder = Path(folder_path)
+        suffixes = frozenset(ext.lower() for ext in extensions)
         
+        # One directory scan for all extensions
         audio_files = []
-        for ext in extensions:
-            audio_files.extend(folder.glob(f"*{ext}"))
+        if os.path.isdir(folder_path):
+            with os.scandir(folder_path) as entries:
+                audio_files = sorted(
+                    entry.path for entry in entries
+                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in suffixes
+                )
         
         if not audio_files:
             self._log(f"⚠️ No audio files found")
             return []
         
-        results = []
-        for audio_path in audio_files:
-            result = self.process_audio(str(audio_path))
-            results.append(result)
+        done = self._read_results(output_file) if output_file and resume else {}
+        if done:
+            self._log(f"📂 Resuming: {len(done)} files already in {output_file}")
+        
+        output = None
+        if output_file:
+            os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+            output = open(output_file, 'ab' if resume else 'wb')
+            # Start past a last line cut short by a crash
+            if output.tell():
+                with open(output_file, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        output.write(b"\n")
+        
+        results = [None] * len(audio_files)
+        
+        def collect(i: int, future):
+            results[i] = future.result()
+            if output:
+                output.write(orjson.dumps(results[i]) + b"\n")
+                output.flush()
+        
+        # Transcription (CPU-bound) of the next files runs while earlier
+        # transcripts are analyzed by the LLM (network-bound)
+        pending = deque()
+        try:
+            with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
+                try:
+                    for i, audio_path in enumerate(audio_files):
+                        previous = done.get(os.path.basename(audio_path))
+                        if previous is not None:
+                            results[i] = previous
+                            continue
+                        
+                        transcript_result = self.stt.transcribe(audio_path)
+                        pending.append((i, executor.submit(self._analyze, audio_path, transcript_result, {})))
+                        
+                        while pending and pending[0][1].done():
+                            collect(*pending.popleft())
+                finally:
+                    # Also on failure, so finished analyses still reach output_file
+                    while pending:
+                        collect(*pending.popleft())
+        finally:
+            if output:
+                output.close()
         
         if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
             self._log(f"💾 Saved to: {output_file}")
         
         return results
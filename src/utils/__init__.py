@@ -2,8 +2,8 @@
 Utility functions for the Insights Engine
 """
 
-from .data_loader import load_data, load_classified_data
+from .data_loader import load_data, load_classified_data, read_excel_cached
 from .helpers import print_header, print_section, format_duration
 
-__all__ = ['load_data', 'load_classified_data', 'print_header', 'print_section', 'format_duration']
+__all__ = ['load_data', 'load_classified_data', 'read_excel_cached', 'print_header', 'print_section', 'format_duration']
 
@@ -3,9 +3,63 @@ Data loading utilities for the Insights Engine
 """
 
 import os
+import pickle
+import hashlib
+import importlib.util
 import pandas as pd
 from typing import Optional
 
+from src.config import WORKBOOK_CACHE_DIR
+
+# Rust-backed calamine parses xlsx several times faster than openpyxl
+# (pandas >= 2.2); openpyxl remains the fallback when it is not installed
+EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+
+def _source_stamp(path: str) -> tuple:
+    """(size, mtime, engine) of a workbook, to tell whether it changed since it was read"""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns, EXCEL_ENGINE or "openpyxl"
+
+
+def _cache_path(path: str) -> str:
+    """Sidecar of a workbook under WORKBOOK_CACHE_DIR, named after its absolute path"""
+    digest = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(WORKBOOK_CACHE_DIR, f"{os.path.basename(path)}.{digest}.pkl")
+
+
+def read_excel_cached(path: str) -> pd.DataFrame:
+    """
+    pd.read_excel(path), through a pickle sidecar in WORKBOOK_CACHE_DIR
+    
+    Parsing the workbook takes far longer than unpickling, so the parsed
+    frame is saved together with the workbook's size, mtime and the engine
+    that parsed it, and reused while all three are unchanged. Sidecars are
+    only read from the (git-ignored) cache directory, never from beside the
+    data. An unreadable sidecar is ignored and rewritten.
+    """
+    cache_path = _cache_path(path)
+    stamp = _source_stamp(path)
+    try:
+        with open(cache_path, "rb") as f:
+            cached_stamp, df = pickle.load(f)
+        if cached_stamp == stamp and isinstance(df, pd.DataFrame):
+            return df
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+    
+    df = pd.read_excel(path, engine=EXCEL_ENGINE)
+    try:
+        os.makedirs(WORKBOOK_CACHE_DIR, exist_ok=True)
+        # Write then rename, so a crash never leaves a truncated sidecar
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((stamp, df), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return df
+
 
 def load_data(filepath: str = "data/Data Voice Hackathon_Master.xlsx") -> Optional[pd.DataFrame]:
     """
@@ -28,7 +82,7 @@ def load_data(filepath: str = "data/Data Voice Hackathon_Master.xlsx") -> Option
     for path in paths_to_try:
         if os.path.exists(path):
             try:
-                df = pd.read_excel(path)
+                df = read_excel_cached(path)
                 print(f"✅ Loaded {len(df):,} records from {path}")
                 return df
             except Exception as e:
@@ -0,0 +1,454 @@
+"""
+Shared NVIDIA NIM client construction for the agents
+"""
+
+import os
+import re
+import time
+import atexit
+import asyncio
+import hashlib
+import weakref
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+import httpx
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    BadRequestError,
+    RateLimitError,
+    APITimeoutError,
+    APIConnectionError,
+    InternalServerError
+)
+from tenacity import wait_random_exponential
+
+from src.config import (
+    NVIDIA_BASE_URL,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP2_ENABLED,
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    LLM_CONCURRENCY,
+    LLM_CACHE_SIZE,
+    RETRY_DELAY
+)
+
+
+def create_client(api_key: str, base_url: str = NVIDIA_BASE_URL) -> OpenAI:
+    """Create a sync NIM client with a pooled httpx transport"""
+    return OpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        http_client=httpx.Client(
+            http2=HTTP2_ENABLED,
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    )
+
+
+def create_async_client(api_key: str, base_url: str = NVIDIA_BASE_URL) -> AsyncOpenAI:
+    """Create an async NIM client multiplexing requests over HTTP/2"""
+    return AsyncOpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        http_client=httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        )
+    )
+
+
+class AsyncClientCache:
+    """
+    One AsyncOpenAI client and concurrency semaphore per event loop.
+    httpx async pools and asyncio semaphores cannot be shared across loops,
+    so each loop gets its own pair. Sync entry points go through run_sync,
+    so in practice there is one long-lived pair on the background loop.
+    """
+
+    def __init__(self, api_key: str, concurrency: int = LLM_CONCURRENCY,
+                 base_url: str = NVIDIA_BASE_URL):
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.base_url = base_url
+        self._state = weakref.WeakKeyDictionary()
+        _async_client_caches.add(self)
+
+    def get(self) -> Tuple[AsyncOpenAI, asyncio.Semaphore]:
+        """Return the client and semaphore bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        state = self._state.get(loop)
+        if state is None:
+            state = self._state[loop] = (
+                create_async_client(self.api_key, self.base_url),
+                asyncio.Semaphore(self.concurrency)
+            )
+        return state
+
+    async def aclose(self):
+        """Close and forget the running loop's client"""
+        state = self._state.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].close()
+
+    def reset(self):
+        """Forget all clients without closing them (e.g. in a forked child, where the sockets belong to the parent)"""
+        self._state = weakref.WeakKeyDictionary()
+
+
+_async_client_caches = weakref.WeakSet()
+
+
+# One event loop on a daemon thread runs every sync wrapper's coroutine, so
+# the per-loop async clients above (and their connection pools) live for the
+# whole process instead of being opened, and never closed, per asyncio.run
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def run_sync(coro: Awaitable) -> Any:
+    """
+    Run coro on the background event loop and wait for its result
+    
+    Use instead of asyncio.run in blocking wrappers around async methods.
+    Must not be called from a coroutine running on that loop.
+    """
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        if asyncio.iscoroutine(coro):
+            coro.close()
+        raise RuntimeError("run_sync() cannot be called from the background event loop")
+    
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result()
+    except KeyboardInterrupt:
+        future.cancel()
+        raise
+
+
+def _close_background_loop():
+    """Close the background loop's clients at exit"""
+    loop = _loop
+    if loop is None or not loop.is_running():
+        return
+    
+    async def close_clients():
+        for clients in list(_async_client_caches):
+            await clients.aclose()
+    
+    try:
+        asyncio.run_coroutine_threadsafe(close_clients(), loop).result(timeout=5)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(_close_background_loop)
+
+
+# Errors worth retrying: the request may succeed once the server recovers
+TRANSIENT_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# Error text of a 400 caused by the response_format itself (schema mode not
+# supported), as opposed to e.g. a prompt over the context length
+_RESPONSE_FORMAT_ERROR_RE = re.compile(r"response_format|json_schema", re.I)
+
+
+def is_response_format_rejection(error: BadRequestError) -> bool:
+    """Whether a 400 is the endpoint rejecting structured output, so a free-text retry can succeed"""
+    return bool(_RESPONSE_FORMAT_ERROR_RE.search(str(error)))
+
+
+# Jitter spreads retries out so concurrent requests don't all hit the
+# server again at the moment a rate limit lifts
+_backoff = wait_random_exponential(min=RETRY_DELAY, max=30)
+
+# Pause once the server reports this few requests left in its window
+RATE_LIMIT_LOW_WATERMARK = 2
+
+
+def retry_wait(retry_state) -> float:
+    """tenacity wait: the server's Retry-After on a 429, else jittered exponential backoff"""
+    error = retry_state.outcome.exception()
+    if isinstance(error, RateLimitError):
+        try:
+            return min(float(error.response.headers.get("retry-after")), 30.0)
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
+
+def rate_limit_delay(headers) -> float:
+    """
+    Seconds to hold off before the next request, from a response's rate-limit
+    headers: 0 unless the server says the request budget is nearly spent
+    """
+    remaining = headers.get("x-ratelimit-remaining-requests", headers.get("x-ratelimit-remaining"))
+    try:
+        if remaining is None or int(remaining) > RATE_LIMIT_LOW_WATERMARK:
+            return 0.0
+    except ValueError:
+        return 0.0
+    
+    reset = headers.get("retry-after") or headers.get("x-ratelimit-reset-requests") or "1"
+    try:
+        return min(float(reset.rstrip("s")), 30.0)
+    except ValueError:
+        return 1.0
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket allowing `rate` requests per `period` seconds.
+    Short bursts go straight through, after that requests are paced evenly
+    instead of sleeping a fixed delay after every call.
+    
+    Usage: `async with limiter: ...`. Not bound to an event loop, so one
+    limiter can be shared across asyncio.run calls.
+    """
+
+    def __init__(self, rate: float, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+    def defer(self, delay: float):
+        """Hold back every waiting and future request for `delay` seconds"""
+        self._tokens = min(self._tokens, 1 - delay * self.rate / self.period)
+        self._updated = time.monotonic()
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+# Process-wide clients, one per API key (and endpoint), so every agent instance reuses the
+# same connection pools instead of paying connection setup per instance
+_shared_lock = threading.Lock()
+_shared_clients = {}
+_shared_async_clients = {}
+
+
+def get_shared_client(api_key: str, base_url: str = NVIDIA_BASE_URL) -> OpenAI:
+    """Process-wide sync client for api_key and base_url (created on first use)"""
+    with _shared_lock:
+        client = _shared_clients.get((api_key, base_url))
+        if client is None:
+            client = _shared_clients[(api_key, base_url)] = create_client(api_key, base_url)
+        return client
+
+
+def get_shared_async_clients(api_key: str) -> AsyncClientCache:
+    """Process-wide per-loop async clients for api_key (created on first use)"""
+    with _shared_lock:
+        clients = _shared_async_clients.get(api_key)
+        if clients is None:
+            clients = _shared_async_clients[api_key] = AsyncClientCache(api_key)
+        return clients
+
+
+def _reset_shared_clients():
+    """A forked child must not reuse the parent's open connections"""
+    global _shared_lock, _loop, _loop_lock
+    _shared_lock = threading.Lock()
+    _shared_clients.clear()
+    _shared_async_clients.clear()
+    # The loop's thread does not survive fork; a new one starts on first use
+    _loop = None
+    _loop_lock = threading.Lock()
+    for clients in list(_async_client_caches):
+        clients.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_shared_clients)
+
+
+# JSON schema building blocks for response_format
+SCHEMA_STR = {"type": "string"}
+SCHEMA_BOOL = {"type": "boolean"}
+SCHEMA_STR_LIST = {"type": "array", "items": SCHEMA_STR}
+
+
+def schema_enum(*values: str, extra: Optional[str] = None) -> Dict[str, Any]:
+    """String schema limited to values, plus extra if given (e.g. "INSUFFICIENT_DATA")"""
+    return {"type": "string", "enum": [*values, extra] if extra else list(values)}
+
+
+def schema_object(**properties) -> Dict[str, Any]:
+    """Object schema requiring every one of properties"""
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+# Characters that change the brace scanner's state; everything else is skipped
+_JSON_STRUCTURE_RE = re.compile(r'[{}"\\]')
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced {...} in text (string/escape aware), or None.
+    Handles ```json fences and prose before or after the object in one pass,
+    jumping between braces, quotes and backslashes instead of visiting
+    every character.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    
+    depth = 0
+    in_string = False
+    escape_at = -1
+    for match in _JSON_STRUCTURE_RE.finditer(text, start):
+        i = match.start()
+        if i == escape_at:
+            continue
+        ch = match.group()
+        if ch == "\\":
+            if in_string:
+                escape_at = i + 1
+        elif ch == '"':
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif ch == "{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+class DiskCache:
+    """
+    On-disk cache of request results keyed by a hash of the request, one file
+    per entry at <cache_dir>/<hash[:2]>/<hash><suffix>. Entries are never
+    evicted; delete the directory to clear it.
+    """
+
+    def __init__(self, cache_dir: str, suffix: str = ".json"):
+        self.cache_dir = cache_dir
+        self.suffix = suffix
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Digest of everything that determines the response (model, sampling, prompt)"""
+        return hashlib.blake2b("\x00".join(map(str, parts)).encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}{self.suffix}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so a crash never leaves a truncated entry; the
+            # thread id keeps concurrent writers of one key off each other's file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # A failed cache write must never fail the request
+            pass
+
+
+class ResponseCache:
+    """
+    Bounded, thread-safe LRU of LLM responses keyed by a hash of the request.
+    Repeat tickets re-send identical prompts; a hit skips the round-trip.
+    Callers should only put replies they have validated; empty replies are
+    never stored and an empty entry reads as a miss.
+    
+    With a cache_dir, responses are also kept in a DiskCache there, so
+    re-runs over the same data skip requests made by earlier runs.
+    """
+
+    key = staticmethod(DiskCache.key)
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, cache_dir: Optional[str] = None):
+        self.maxsize = maxsize
+        self.disk = DiskCache(cache_dir, suffix=".txt") if cache_dir else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value:
+                self._entries.move_to_end(key)
+                return value
+        
+        if self.disk is not None:
+            data = self.disk.get(key)
+            if not data:
+                return None
+            value = data.decode("utf-8", errors="replace")
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: str):
+        if self.maxsize <= 0 or not value:
+            return
+        self._remember(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value.encode("utf-8"))
+
+    def _remember(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,104 @@
+"""
+Tests for the incremental JSON parsers: extract_json_object and the
+streaming field scanner used by the executive popup
+"""
+
+import json
+
+import pytest
+
+from src.agents.insights_agent import _JSONFieldScanner
+from src.utils.llm_client import extract_json_object
+
+
+POPUP = {
+    "seller_mood": "irritated \"very\" upset",
+    "key_concern": "C:\\leads\\{broken}",
+    "top_5_talking_points": ["p", {"nested": ["x", "y"]}, "s", 3, "t"],
+    "upsell_hint": None,
+    "count": 12,
+    "ok": True
+}
+
+
+def feed_in_chunks(text: str, size: int):
+    """All pairs a fresh scanner returns when text arrives size characters at a time"""
+    scanner = _JSONFieldScanner()
+    fields = []
+    for start in range(0, len(text), size):
+        fields.extend(scanner.feed(text[start:start + size]))
+    return fields
+
+
+# =============================================================================
+# extract_json_object
+# =============================================================================
+
+def test_extract_plain_object():
+    text = json.dumps(POPUP)
+    assert json.loads(extract_json_object(text)) == POPUP
+
+
+def test_extract_from_code_fence_and_prose():
+    text = "Here you go:\n```json\n" + json.dumps(POPUP, indent=2) + "\n```\nHope that helps {not json}"
+    assert json.loads(extract_json_object(text)) == POPUP
+
+
+def test_extract_ignores_braces_in_escaped_strings():
+    obj = {"a": "quote \" then } brace", "b": "backslash \\", "c": "\\\"}"}
+    text = "prefix " + json.dumps(obj) + " suffix }"
+    assert json.loads(extract_json_object(text)) == obj
+
+
+def test_extract_truncated_object_returns_none():
+    text = json.dumps(POPUP)
+    assert extract_json_object(text[:-5]) is None
+    assert extract_json_object("no object here") is None
+
+
+# =============================================================================
+# _JSONFieldScanner
+# =============================================================================
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1000])
+def test_scanner_chunked_feed_matches_json(size):
+    text = "```json\n" + json.dumps(POPUP, indent=2) + "\n```"
+    fields = feed_in_chunks(text, size)
+    top_level = {key: value for key, value in fields if "[" not in key}
+    assert top_level == POPUP
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_scanner_indexes_every_array_element(size):
+    fields = feed_in_chunks(json.dumps(POPUP), size)
+    items = [(key, value) for key, value in fields if key.startswith("top_5_talking_points[")]
+    # Only string items are emitted, at their position among all elements
+    assert items == [
+        ("top_5_talking_points[0]", "p"),
+        ("top_5_talking_points[2]", "s"),
+        ("top_5_talking_points[4]", "t")
+    ]
+
+
+def test_scanner_item_emitted_before_array_closes():
+    scanner = _JSONFieldScanner()
+    assert scanner.feed('{"points": ["first", "sec') == [("points[0]", "first")]
+    assert scanner.feed('ond"]}') == [("points[1]", "second"), ("points", ["first", "second"])]
+
+
+def test_scanner_escaped_quotes_and_backslashes():
+    obj = {"a": "say \"hi\"", "b": "path\\to\\", "c": ["\\\"", "}"]}
+    fields = feed_in_chunks(json.dumps(obj), 1)
+    assert dict(fields) == {"a": obj["a"], "b": obj["b"], "c[0]": "\\\"", "c[1]": "}", "c": obj["c"]}
+
+
+def test_scanner_truncated_object_emits_only_complete_fields():
+    text = json.dumps({"a": "done", "b": [1, "two"], "c": "cut off here"})
+    fields = feed_in_chunks(text[:text.index("cut") + 3], 4)
+    assert fields == [("a", "done"), ("b[1]", "two"), ("b", [1, "two"])]
+
+
+def test_scanner_ignores_text_after_object():
+    scanner = _JSONFieldScanner()
+    assert scanner.feed('{"a": 1} {"b": 2}') == [("a", 1)]
+    assert scanner.feed('{"c": 3}') == []